@@ -2,64 +2,733 @@
 
 import requests
 import json
-from config import WHISPER_API_URL
+import os
+import struct
+import hashlib
+import threading
+import time
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from config import (
+    WHISPER_API_URLS,
+    HTTP_POOL_SIZE,
+    LOAD_BALANCING,
+    CONNECT_TIMEOUT,
+    CIRCUIT_BREAKER_FAILURES,
+    CIRCUIT_BREAKER_COOLDOWN,
+    HEDGE_REQUESTS,
+    HEDGE_DELAY,
+    HEALTH_CHECK_INTERVAL,
+    HEALTH_RECHECK_INTERVAL,
+    REQUEST_OVERHEAD,
+    INITIAL_RTF,
+    TIMEOUT_FACTOR,
+    MIN_READ_TIMEOUT,
+    MAX_RETRIES,
+    RETRY_BACKOFF,
+    ENABLE_TRANSCRIPTION_CACHE,
+    TRANSCRIPTION_CACHE_SIZE,
+    TRANSCRIPTION_CACHE_TTL,
+    TRANSCRIPTION_CACHE_DIR,
+    UPLOAD_ENCODING,
+    BEAM_SIZE,
+    GREEDY_MAX_DURATION
+)
+
+
+# Upload file names and content types, keyed by the container's magic bytes
+AUDIO_SIGNATURES = {
+    b'RIFF': ('recording.wav', 'audio/wav'),
+    b'fLaC': ('recording.flac', 'audio/flac'),
+    b'OggS': ('recording.ogg', 'audio/ogg'),
+}
+
+# Raw 16 kHz mono uploads, keyed by UPLOAD_ENCODING: (file name, content type, bytes per sample)
+PCM_FORMATS = {
+    'pcm_int16': ('recording.pcm', 'audio/x-pcm-s16le', 2),
+    'pcm_float32': ('recording.pcm', 'audio/x-pcm-f32le', 4),
+}
+
+
+def upload_format(audio):
+    """Return the (file name, content type) to upload an encoded recording as."""
+    signature = AUDIO_SIGNATURES.get(bytes(audio[:4]))
+    if signature is None and UPLOAD_ENCODING in PCM_FORMATS:
+        # Headerless PCM has no magic bytes to go by
+        return PCM_FORMATS[UPLOAD_ENCODING][:2]
+    return signature or AUDIO_SIGNATURES[b'RIFF']
+
+
+def audio_duration(audio):
+    """
+    Read the duration of an encoded WAV, FLAC or Ogg/Opus payload from its headers,
+    or from its length for raw PCM uploads.
+    
+    Returns:
+        float: Duration in seconds, or None if it cannot be determined
+    """
+    try:
+        if audio[:4] == b'RIFF':
+            byte_rate, offset = None, 12
+            while offset + 8 <= len(audio):
+                chunk_id = bytes(audio[offset:offset + 4])
+                chunk_size = struct.unpack('<I', audio[offset + 4:offset + 8])[0]
+                if chunk_id == b'fmt ':
+                    byte_rate = struct.unpack('<I', audio[offset + 16:offset + 20])[0]
+                elif chunk_id == b'data' and byte_rate:
+                    return min(chunk_size, len(audio) - offset - 8) / byte_rate
+                offset += 8 + chunk_size + (chunk_size & 1)
+        elif audio[:4] == b'fLaC':
+            # STREAMINFO: 20-bit sample rate, then channels/bits, then 36-bit sample count
+            info = int.from_bytes(audio[18:26], 'big')
+            sample_rate = info >> 44
+            total_samples = info & 0xFFFFFFFFF
+            return total_samples / sample_rate if sample_rate else None
+        elif audio[:4] == b'OggS':
+            # Opus granule positions count 48 kHz samples
+            last_page = bytes(audio).rfind(b'OggS')
+            granule = struct.unpack('<q', audio[last_page + 6:last_page + 14])[0]
+            return max(granule, 0) / 48000
+        elif UPLOAD_ENCODING in PCM_FORMATS:
+            return len(audio) / (PCM_FORMATS[UPLOAD_ENCODING][2] * 16000)
+    except (struct.error, IndexError):
+        pass
+    return None
+
+
+def decoding_params(duration):
+    """
+    Query parameters that tune the server's decoding for a clip.
+    
+    Short clips (commands) are decoded greedily, where latency matters
+    more than the small accuracy gain of beam search.
+    """
+    if duration is not None and duration <= GREEDY_MAX_DURATION:
+        return {'beam_size': 1}
+    if BEAM_SIZE:
+        return {'beam_size': BEAM_SIZE}
+    return {}
+
+
+class ServerBusyError(requests.exceptions.RequestException):
+    """The server's transcription queue is full (HTTP 429)."""
+    
+    def __init__(self, response):
+        try:
+            self.retry_after = float(response.headers.get('Retry-After', 0))
+        except ValueError:
+            self.retry_after = 0.0
+        super().__init__(f"{response.url} is busy", response=response)
+
+
+class Endpoint:
+    """A Whisper API server with load, latency and circuit breaker bookkeeping."""
+    
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.latency = None  # Moving average of successful request latency (seconds)
+        self.rtf = INITIAL_RTF  # Moving average of server seconds per audio second
+        self.latencies = deque(maxlen=100)
+        self.latency_ratios = deque(maxlen=100)  # Actual / predicted latency, per request
+        self.failures = 0
+        self.open_until = 0.0  # Circuit breaker: skip this endpoint until then
+        self.healthy = None  # Result of the last health probe (None = unknown)
+        self.lock = threading.Lock()
+        # The server's health endpoint lives next to the transcription endpoint
+        if '/v1/' in url:
+            self.health_url = url.split('/v1/', 1)[0] + '/v1/health'
+        else:
+            self.health_url = url.rsplit('/', 1)[0]
+    
+    @property
+    def available(self):
+        """False while the circuit breaker is open or the server is known to be down."""
+        return self.healthy is not False and time.monotonic() >= self.open_until
+    
+    def set_health(self, healthy):
+        """
+        Record a health probe result.
+        
+        Returns:
+            bool: True if the up/down state changed
+        """
+        with self.lock:
+            changed = self.healthy is not None and self.healthy != healthy
+            self.healthy = healthy
+            if healthy:
+                self.failures = 0
+                self.open_until = 0.0
+        return changed
+    
+    def begin(self):
+        with self.lock:
+            self.outstanding += 1
+    
+    def end(self):
+        with self.lock:
+            self.outstanding -= 1
+    
+    def record_success(self, latency=None, duration=None):
+        """Close the circuit breaker and fold a latency sample into the averages."""
+        with self.lock:
+            self.failures = 0
+            self.open_until = 0.0
+            if latency is not None:
+                self.latencies.append(latency)
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if latency is not None and duration:
+                self.latency_ratios.append(latency / self.predict_latency(duration))
+                rtf = max(latency - REQUEST_OVERHEAD, 0.0) / duration
+                self.rtf = 0.8 * self.rtf + 0.2 * rtf
+    
+    def predict_latency(self, duration):
+        """Expected server latency for a clip, from the real-time-factor estimate."""
+        return REQUEST_OVERHEAD + self.rtf * duration
+    
+    def read_timeout(self, duration):
+        """Read timeout scaled to the clip length (a fixed 30 s if unknown)."""
+        if duration is None:
+            return 30
+        return max(MIN_READ_TIMEOUT, TIMEOUT_FACTOR * self.predict_latency(duration))
+    
+    def record_failure(self):
+        """Count a failure, opening the circuit breaker after too many in a row."""
+        with self.lock:
+            self.failures += 1
+            if self.failures >= CIRCUIT_BREAKER_FAILURES:
+                self.open_until = time.monotonic() + CIRCUIT_BREAKER_COOLDOWN
+    
+    def hedge_delay(self, duration=None):
+        """
+        Latency budget after which a request is hedged.
+        
+        For a clip of known length this is the predicted latency scaled by the
+        p95 of recent actual/predicted ratios, so long dictations get a budget
+        in proportion to their length rather than that of short commands.
+        Otherwise it is the p95 of recent latencies.
+        """
+        with self.lock:
+            samples = self.latencies if duration is None else self.latency_ratios
+            if len(samples) < 10:
+                return HEDGE_DELAY if duration is None else max(HEDGE_DELAY, self.predict_latency(duration))
+            ordered = sorted(samples)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        return p95 if duration is None else p95 * self.predict_latency(duration)
+
+
+class TranscriptionCache:
+    """
+    LRU cache of transcriptions keyed by a hash of the uploaded audio.
+    
+    The recorder has already trimmed and quantized the audio, so identical
+    replays (retries, benchmark replays, duplicate uploads) produce the
+    same payload and the same key. An optional on-disk tier keeps entries
+    across daemon restarts.
+    """
+    
+    def __init__(self, max_entries=TRANSCRIPTION_CACHE_SIZE, ttl=TRANSCRIPTION_CACHE_TTL,
+                 directory=TRANSCRIPTION_CACHE_DIR):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.entries = OrderedDict()  # key -> (text, stored_at)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+    
+    @staticmethod
+    def make_key(audio, **params):
+        """Hash the audio payload together with the request parameters."""
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8'))
+        digest.update(audio)
+        return digest.hexdigest()
+    
+    def get(self, key):
+        """Return the cached text for a key, or None on a miss."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and now - entry[1] <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.entries.pop(key, None)
+        
+        entry = self._read_disk(key)
+        with self.lock:
+            if entry and now - entry[1] <= self.ttl:
+                self._store(key, entry)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return None
+    
+    def put(self, key, text):
+        """Cache the transcription for a key."""
+        entry = (text, time.time())
+        with self.lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+    
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+    
+    def _store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{key}.json"), 'r') as f:
+                data = json.load(f)
+            return data["text"], data["stored_at"]
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def _write_disk(self, key, entry):
+        if not self.directory:
+            return
+        try:
+            path = os.path.join(self.directory, f"{key}.json")
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump({"text": entry[0], "stored_at": entry[1]}, f)
+            os.replace(f"{path}.tmp", path)
+            self._prune_disk()
+        except OSError as e:
+            print(f"Could not write transcription cache entry: {e}")
+    
+    def _prune_disk(self):
+        """Drop the oldest on-disk entries beyond max_entries."""
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.endswith('.json')]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
 
 class WhisperAPIClient:
     """Client for interacting with the Whisper API."""
     
     def __init__(self, api_url=None):
-        self.api_url = api_url or WHISPER_API_URL
+        if api_url is None:
+            api_urls = WHISPER_API_URLS
+        elif isinstance(api_url, str):
+            api_urls = [api_url]
+        else:
+            api_urls = api_url
+        self.endpoints = [Endpoint(url) for url in api_urls]
+        self.api_url = self.endpoints[0].url
+        
+        # Keep-alive session so transcriptions reuse a warm TCP/TLS connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Transcriptions of previously seen audio
+        self.cache = TranscriptionCache() if ENABLE_TRANSCRIPTION_CACHE else None
+        
+        # Runs the primary and backup of hedged requests
+        self.hedge_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix='hedge')
+        
+        # Background health monitor (see start_health_monitor)
+        self.health_thread = None
+        self.health_stop = threading.Event()
+    
+    @property
+    def is_down(self):
+        """True when every endpoint failed its last health probe."""
+        return all(endpoint.healthy is False for endpoint in self.endpoints)
+    
+    def start_health_monitor(self):
+        """
+        Probe the servers' health endpoints in the background.
+        
+        Healthy servers are probed every HEALTH_CHECK_INTERVAL seconds and
+        down servers every HEALTH_RECHECK_INTERVAL seconds, so transcriptions
+        fail fast while the backend is down and resume as soon as it is back.
+        """
+        if self.health_thread is not None:
+            return
+        self.health_stop.clear()
+        self.health_thread = threading.Thread(target=self._health_loop, daemon=True)
+        self.health_thread.start()
+    
+    def stop_health_monitor(self):
+        """Stop the background health monitor."""
+        self.health_stop.set()
+        if self.health_thread is not None:
+            self.health_thread.join(timeout=5)
+            self.health_thread = None
+    
+    def _health_loop(self):
+        interval = HEALTH_CHECK_INTERVAL
+        while not self.health_stop.wait(interval):
+            self.check_api_health()
+            if any(endpoint.healthy is False for endpoint in self.endpoints):
+                interval = HEALTH_RECHECK_INTERVAL
+            else:
+                interval = HEALTH_CHECK_INTERVAL
+    
+    def warm_up(self):
+        """
+        Open a pooled connection to the API in the background.
+        
+        Called when a recording starts so the connection is already
+        established by the time the audio is ready to upload.
+        """
+        threading.Thread(target=self.check_api_health, daemon=True).start()
     
-    def transcribe_audio(self, audio_file_path):
+    def transcribe_audio(self, audio):
         """
-        Send audio file to Whisper API for transcription.
+        Send audio to Whisper API for transcription.
         
         Args:
-            audio_file_path (str): Path to the audio file to transcribe
-            
+            audio (bytes or str): In-memory WAV/FLAC/Ogg data, or a path to an audio file
+        
         Returns:
             str: Transcribed text, or None if transcription failed
         """
         try:
-            with open(audio_file_path, 'rb') as audio_file:
-                files = {'file': audio_file}
-                
-                print(f"Sending audio to Whisper API at {self.api_url}...")
-                response = requests.post(self.api_url, files=files, timeout=30)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    text = result.get('text', '').strip()
-                    print(f"Transcription received: {text}")
-                    return text
-                else:
-                    print(f"API error: {response.status_code} - {response.text}")
-                    return None
+            file_field, duration, cache_key, cached = self._prepare_request(audio)
+            if cached is not None or file_field is None:
+                return cached
+            
+            text = self._transcribe_with_retries(file_field, duration)
+            if cache_key is not None and text is not None:
+                self.cache.put(cache_key, text)
+            return text
+        except Exception as e:
+            self._report_error(e)
+            return None
+    
+    def transcribe_audio_stream(self, audio):
+        """
+        Send audio to the API's streaming endpoint and yield text as it is decoded.
+        
+        Servers without streaming support answer with a single JSON body,
+        which is yielded as one piece.
         
-        except requests.exceptions.ConnectionError:
+        Args:
+            audio (bytes or str): In-memory WAV/FLAC/Ogg data, or a path to an audio file
+            
+        Yields:
+            str: The text of each segment, in order (nothing if transcription failed)
+        """
+        try:
+            file_field, duration, cache_key, cached = self._prepare_request(audio)
+            if cached:
+                yield cached
+            if cached is not None or file_field is None:
+                return
+            
+            text = yield from self._stream_with_retries(file_field, duration)
+            if cache_key is not None and text is not None:
+                self.cache.put(cache_key, text)
+        except Exception as e:
+            self._report_error(e)
+    
+    def _prepare_request(self, audio):
+        """
+        First steps shared by both transcription paths: read the audio, look it
+        up in the cache and check that the API is up.
+        
+        Returns:
+            tuple: (file_field, duration, cache_key, cached_text). cached_text is
+                the transcription on a cache hit; file_field is None when nothing
+                should be sent (cache hit, or every server is down)
+        """
+        if isinstance(audio, str):
+            # Read the file once so it can be re-sent on failover
+            with open(audio, 'rb') as audio_file:
+                audio = audio_file.read()
+        filename, content_type = upload_format(audio)
+        
+        duration = audio_duration(audio)
+        cache_key = None
+        if self.cache is not None:
+            # Any configured server may answer, so they are all part of the key
+            urls = [endpoint.url for endpoint in self.endpoints]
+            cache_key = self.cache.make_key(audio, content_type=content_type, urls=urls,
+                                            **decoding_params(duration))
+            text = self.cache.get(cache_key)
+            if text is not None:
+                print(f"Transcription cache hit: {text}")
+                return None, duration, cache_key, text
+        
+        if self.is_down:
+            print("Error: Whisper API is down (health checks failing), not sending audio.")
+            return None, duration, cache_key, None
+        
+        return (filename, audio, content_type), duration, cache_key, None
+    
+    @staticmethod
+    def _report_error(error):
+        """Print why a transcription failed."""
+        if isinstance(error, requests.exceptions.ConnectionError):
             print("Error: Could not connect to Whisper API. Is the Docker container running?")
-            return None
-        except requests.exceptions.Timeout:
+        elif isinstance(error, requests.exceptions.Timeout):
             print("Error: Request to Whisper API timed out.")
+        elif isinstance(error, ServerBusyError):
+            print("Error: Whisper API is busy (transcription queue full), try again shortly.")
+        else:
+            print(f"Error during transcription: {error}")
+    
+    def _stream_with_retries(self, file_field, duration):
+        """
+        Run the streaming failover sequence with the same retries and backoff as
+        _transcribe_with_retries, as long as no segment has been yielded yet
+        (after that the text may already be injected, so nothing is re-sent).
+        
+        Returns:
+            str: The full text, as _stream_with_failover returns it
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            received = []
+            try:
+                return (yield from self._stream_with_failover(file_field, duration, received))
+            except requests.exceptions.RequestException as e:
+                if received or attempt == MAX_RETRIES or self.is_down:
+                    raise
+                delay = self._retry_delay(attempt, e)
+                print(f"Transcription attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+    
+    def _stream_with_failover(self, file_field, duration, received):
+        """
+        Open a streaming request on the first endpoint that accepts it and yield its segments.
+        
+        Args:
+            received (list): Segment texts are appended here as they are yielded
+        
+        Returns:
+            str: The full text as the server joined it (as a non-streaming
+                request would return it), or None on an API error
+        """
+        tried = set()
+        last_error = None
+        while True:
+            endpoint = self._select_endpoint(exclude=tried)
+            if endpoint is None:
+                raise last_error
+            tried.add(endpoint)
+            
+            read_timeout = endpoint.read_timeout(duration)
+            print(f"Streaming audio to Whisper API at {endpoint.url}...")
+            endpoint.begin()
+            start = time.monotonic()
+            try:
+                response = self.session.post(endpoint.url, params={'stream': 'true', **decoding_params(duration)},
+                                             files={'file': file_field},
+                                             timeout=(CONNECT_TIMEOUT, read_timeout), stream=True)
+                if response.status_code == 429:
+                    response.close()
+                    raise ServerBusyError(response)
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                endpoint.end()
+                if not isinstance(e, ServerBusyError):
+                    endpoint.record_failure()
+                last_error = e
+                if len(tried) < len(self.endpoints):
+                    print(f"Whisper API at {endpoint.url} failed ({type(e).__name__}), trying next server...")
+                continue
+            
+            # Once segments start arriving there is no failover: they may already be injected
+            try:
+                if response.status_code != 200:
+                    print(f"API error: {response.status_code} - {response.text}")
+                    return None
+                full_text = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event.get('type') == 'done':
+                        full_text = event.get('text', '').strip()
+                        break
+                    text = event.get('text', '').strip()
+                    if text:
+                        print(f"Segment received: {text}")
+                        received.append(text)
+                        yield text
+                endpoint.record_success(time.monotonic() - start, duration)
+                return full_text if full_text is not None else " ".join(received)
+            except requests.exceptions.RequestException:
+                # The stream broke off part way; counts like any failed request
+                endpoint.record_failure()
+                raise
+            finally:
+                response.close()
+                endpoint.end()
+    
+    def _select_endpoint(self, exclude=()):
+        """
+        Pick the endpoint for the next request.
+        
+        Endpoints with an open circuit breaker are skipped unless every
+        endpoint is open, in which case the one closest to recovery is tried.
+        """
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        if not candidates:
             return None
-        except Exception as e:
-            print(f"Error during transcription: {e}")
+        
+        available = [endpoint for endpoint in candidates if endpoint.available]
+        if not available:
+            return min(candidates, key=lambda endpoint: endpoint.open_until)
+        
+        if LOAD_BALANCING == 'latency':
+            # Expected wait: queue length times typical latency (unknown = try it)
+            return min(available, key=lambda endpoint: (endpoint.outstanding + 1) * (endpoint.latency or 0.0))
+        return min(available, key=lambda endpoint: (endpoint.outstanding, endpoint.latency or 0.0))
+    
+    def _transcribe_with_retries(self, file_field, duration):
+        """Run the failover sequence, retrying it up to MAX_RETRIES times with backoff."""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                return self._transcribe_with_failover(file_field, duration)
+            except requests.exceptions.RequestException as e:
+                if attempt == MAX_RETRIES or self.is_down:
+                    raise
+                delay = self._retry_delay(attempt, e)
+                print(f"Transcription attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+    
+    @staticmethod
+    def _retry_delay(attempt, error):
+        """Backoff before retry number attempt + 1, honoring a busy server's Retry-After."""
+        delay = RETRY_BACKOFF * 2 ** attempt
+        if isinstance(error, ServerBusyError):
+            delay = max(delay, error.retry_after)
+        return delay
+    
+    def _transcribe_with_failover(self, file_field, duration):
+        """Try endpoints in order of preference until one answers."""
+        tried = set()
+        last_error = None
+        while True:
+            endpoint = self._select_endpoint(exclude=tried)
+            if endpoint is None:
+                break
+            tried.add(endpoint)
+            try:
+                if HEDGE_REQUESTS:
+                    return self._post_hedged(endpoint, file_field, tried, duration)
+                return self._post_audio(endpoint, file_field, duration)
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                if len(tried) < len(self.endpoints):
+                    print(f"Whisper API at {endpoint.url} failed ({type(e).__name__}), trying next server...")
+        raise last_error
+    
+    def _post_hedged(self, endpoint, file_field, tried, duration):
+        """
+        Send a request and, if it exceeds the endpoint's latency budget,
+        a second one to another endpoint; whichever answers first wins.
+        """
+        primary = self.hedge_executor.submit(self._post_audio, endpoint, file_field, duration)
+        delay = endpoint.hedge_delay(duration)
+        done, _ = wait([primary], timeout=delay)
+        backup_endpoint = None if done else self._select_endpoint(exclude=tried)
+        if backup_endpoint is None:
+            return primary.result()
+        
+        tried.add(backup_endpoint)
+        print(f"No answer from {endpoint.url} after {delay:.2f}s, hedging to {backup_endpoint.url}...")
+        pending = {primary, self.hedge_executor.submit(self._post_audio, backup_endpoint, file_field, duration)}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except requests.exceptions.RequestException as e:
+                    last_error = e
+        raise last_error
+    
+    def _post_audio(self, endpoint, file_field, duration=None):
+        """Upload a file field to one endpoint and return the transcribed text."""
+        files = {'file': file_field}
+        read_timeout = endpoint.read_timeout(duration)
+        
+        print(f"Sending audio to Whisper API at {endpoint.url}...")
+        endpoint.begin()
+        start = time.monotonic()
+        try:
+            response = self.session.post(endpoint.url, params=decoding_params(duration), files=files,
+                                         timeout=(CONNECT_TIMEOUT, read_timeout))
+            if response.status_code == 429:
+                raise ServerBusyError(response)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        except ServerBusyError:
+            # A full queue is not a fault; leave the circuit breaker alone
+            raise
+        except requests.exceptions.RequestException:
+            # Up/down state is left to the health probe: a single dropped
+            # connection must not stop retries or fail later dictations fast
+            endpoint.record_failure()
+            raise
+        finally:
+            endpoint.end()
+        latency = time.monotonic() - start
+        
+        if response.status_code == 200:
+            # Only real transcriptions feed the breaker and the latency model;
+            # a fast 4xx would drag down the timeouts of every later request
+            if duration is not None:
+                print(f"Whisper latency: predicted {endpoint.predict_latency(duration):.2f}s, actual {latency:.2f}s "
+                      f"for {duration:.1f}s of audio (timeout {read_timeout:.0f}s)")
+            endpoint.record_success(latency, duration)
+            result = response.json()
+            text = result.get('text', '').strip()
+            print(f"Transcription received: {text}")
+            return text
+        else:
+            print(f"API error: {response.status_code} - {response.text}")
             return None
     
     def check_api_health(self):
         """
         Check if the Whisper API is accessible.
         
+        Every endpoint's health URL is probed; the results update each
+        endpoint's up/down state.
+        
         Returns:
-            bool: True if API is accessible, False otherwise
+            bool: True if at least one endpoint is accessible, False otherwise
         """
-        try:
-            # Try to connect to the API
-            response = requests.get(self.api_url.rsplit('/', 1)[0], timeout=5)
-            return True
-        except:
-            return False
+        healthy = False
+        for endpoint in self.endpoints:
+            try:
+                response = self.session.get(endpoint.health_url, timeout=(CONNECT_TIMEOUT, 5))
+                # Any answer below 500 means the server is reachable; servers
+                # without a /v1/health route answer 404
+                endpoint_healthy = response.status_code < 500
+            except requests.exceptions.RequestException:
+                endpoint_healthy = False
+            
+            if endpoint.set_health(endpoint_healthy):
+                state = "back up" if endpoint_healthy else "down"
+                print(f"Whisper API at {endpoint.url} is {state}.")
+            healthy = healthy or endpoint_healthy
+        return healthy
 
 
 if __name__ == "__main__":
@@ -82,4 +751,3 @@ if __name__ == "__main__":
         print(f"\nTranscribed text:\n{text}")
     else:
         print("Transcription failed.")
-
@@ -3,126 +3,684 @@
 import sounddevice as sd
 import numpy as np
 import scipy.io.wavfile as wavfile
+from scipy.signal import firwin, upfirdn
 import threading
-import time
+import io
+import os
+import tempfile
+from math import gcd
+from collections import deque
 from config import (
     SAMPLE_RATE,
     CHANNELS,
     MAX_RECORDING_DURATION,
     SILENCE_THRESHOLD,
     SILENCE_DURATION,
-    TEMP_AUDIO_FILE
+    ADAPTIVE_ENDPOINTING,
+    MIN_SILENCE_DURATION,
+    TRIM_SILENCE,
+    TRIM_PADDING,
+    PREROLL_DURATION,
+    CAPTURE_NATIVE_RATE,
+    STREAMING_MIN_SEGMENT,
+    STREAMING_PAUSE_DURATION,
+    SAVE_AUDIO_FILE,
+    SPOOL_TO_DISK,
+    SPOOL_DIR,
+    TEMP_AUDIO_FILE,
+    UPLOAD_ENCODING
 )
 
 
+def to_wav_bytes(audio_array, sample_rate):
+    """Encode audio frames as an in-memory WAV file (header + PCM)."""
+    wav_file = io.BytesIO()
+    wavfile.write(wav_file, sample_rate, audio_array)
+    return wav_file.getvalue()
+
+
+def trim_silence(audio_array, sample_rate, threshold=SILENCE_THRESHOLD,
+                 padding=TRIM_PADDING, frame_duration=0.02):
+    """
+    Cut leading and trailing silence using per-frame energy.
+    
+    Args:
+        audio_array (np.ndarray): Recorded frames
+        sample_rate (int): Sample rate of the frames in Hz
+        threshold (float): RMS level above which a frame counts as speech
+        padding (float): Seconds of audio kept around the speech
+        frame_duration (float): Analysis frame length in seconds
+        
+    Returns:
+        np.ndarray: A view of the speech region, or None if no frame contains speech
+    """
+    frame_len = max(int(frame_duration * sample_rate), 1)
+    n_frames = len(audio_array) // frame_len
+    if n_frames == 0:
+        return None
+    
+    frames = audio_array[:n_frames * frame_len].reshape(n_frames, -1)
+    energy = np.einsum('ij,ij->i', frames, frames) / frames.shape[1]
+    speech = np.flatnonzero(energy >= threshold ** 2)
+    if len(speech) == 0:
+        return None
+    
+    pad = int(padding * sample_rate)
+    start = max(speech[0] * frame_len - pad, 0)
+    stop = min((speech[-1] + 1) * frame_len + pad, len(audio_array))
+    return audio_array[start:stop]
+
+
+def float_to_int16(audio_array, chunk_frames=65536):
+    """Convert float32 samples in [-1.0, 1.0] to int16 PCM."""
+    pcm = np.empty(audio_array.shape, dtype=np.int16)
+    # Convert in chunks so long (spooled) recordings need no full float copy
+    for start in range(0, len(audio_array), chunk_frames):
+        scaled = np.clip(audio_array[start:start + chunk_frames], -1.0, 1.0)
+        scaled *= 32767.0
+        pcm[start:start + chunk_frames] = np.rint(scaled, out=scaled)
+    return pcm
+
+
+def encode_audio(audio_array, sample_rate, encoding=UPLOAD_ENCODING):
+    """
+    Encode float32 audio frames for upload to the Whisper API.
+    
+    Args:
+        audio_array (np.ndarray): Recorded float32 frames
+        sample_rate (int): Sample rate of the frames in Hz
+        encoding (str): One of 'wav_int16', 'wav_float32', 'flac', 'opus',
+            'pcm_int16' or 'pcm_float32'
+        
+    Returns:
+        bytes: The encoded audio file
+    """
+    if encoding == 'wav_float32':
+        return to_wav_bytes(audio_array, sample_rate)
+    
+    if encoding in ('pcm_int16', 'pcm_float32'):
+        # Headerless samples the server feeds straight to the model, which expects 16 kHz mono
+        if sample_rate == 16000 and (audio_array.ndim == 1 or audio_array.shape[1] == 1):
+            if encoding == 'pcm_int16':
+                return float_to_int16(audio_array).astype('<i2', copy=False).tobytes()
+            return np.ascontiguousarray(audio_array, dtype='<f4').tobytes()
+        print(f"{encoding} needs 16 kHz mono audio, uploading int16 WAV instead.")
+        return to_wav_bytes(float_to_int16(audio_array), sample_rate)
+    
+    if encoding in ('flac', 'opus'):
+        try:
+            import soundfile as sf
+        except ImportError:
+            print(f"soundfile library not installed, uploading int16 WAV instead of {encoding}. "
+                  "Install with: pip install soundfile")
+            return to_wav_bytes(float_to_int16(audio_array), sample_rate)
+        
+        encoded = io.BytesIO()
+        try:
+            if encoding == 'flac':
+                sf.write(encoded, float_to_int16(audio_array), sample_rate, format='FLAC', subtype='PCM_16')
+            else:
+                sf.write(encoded, audio_array, sample_rate, format='OGG', subtype='OPUS')
+            return encoded.getvalue()
+        except Exception as e:
+            print(f"Could not encode {encoding} ({e}), uploading int16 WAV instead.")
+            return to_wav_bytes(float_to_int16(audio_array), sample_rate)
+    
+    if encoding != 'wav_int16':
+        print(f"Unknown upload encoding '{encoding}', uploading int16 WAV instead.")
+    return to_wav_bytes(float_to_int16(audio_array), sample_rate)
+
+
+class RingBuffer:
+    """Fixed-capacity audio buffer that the stream callback writes into in place."""
+    
+    def __init__(self, capacity, channels=1, dtype='float32', spool_dir=None):
+        self.capacity = int(capacity)
+        self.channels = channels
+        if spool_dir:
+            # Spool to a memory-mapped file so resident memory stays bounded. The
+            # file is unnamed and private to this process, so another recorder
+            # cannot truncate it, and it disappears when the process exits
+            os.makedirs(spool_dir, exist_ok=True)
+            self.spool = tempfile.TemporaryFile(dir=spool_dir, prefix='spool-', suffix='.f32')
+            self.data = np.memmap(self.spool, dtype=dtype, mode='w+', shape=(self.capacity, channels))
+        else:
+            self.data = np.zeros((self.capacity, channels), dtype=dtype)
+        self.write_pos = 0  # Total frames written since the last reset
+    
+    def __len__(self):
+        return min(self.write_pos, self.capacity)
+    
+    def reset(self):
+        """Forget all buffered audio without releasing the storage."""
+        self.write_pos = 0
+    
+    def write(self, block):
+        """Copy a block of frames into the buffer, overwriting the oldest audio when full."""
+        frames = len(block)
+        if frames > self.capacity:
+            self.write_pos += frames - self.capacity
+            block = block[-self.capacity:]
+            frames = self.capacity
+        
+        start = self.write_pos % self.capacity
+        end = start + frames
+        if end <= self.capacity:
+            self.data[start:end] = block
+        else:
+            split = self.capacity - start
+            self.data[start:] = block[:split]
+            self.data[:end - self.capacity] = block[split:]
+        self.write_pos += frames
+    
+    def realign(self, frames):
+        """
+        Move the most recent frames to the start of the storage.
+        
+        Positions restart from zero, so a range read from position 0 is a view
+        until the buffer has filled up again.
+        
+        Args:
+            frames (int): Number of most recent frames to keep
+            
+        Returns:
+            int: The number of frames kept
+        """
+        kept = self.latest(frames).copy()
+        self.data[:len(kept)] = kept
+        self.write_pos = len(kept)
+        return self.write_pos
+    
+    def slice(self, start, stop=None):
+        """
+        Return the frames between two absolute write positions.
+        
+        The result is a view into the buffer unless the range wraps around
+        the end of the storage, in which case the two halves are joined. A
+        recording starts at position 0 (see realign), so it only wraps once
+        it has outgrown the buffer.
+        """
+        stop = self.write_pos if stop is None else min(stop, self.write_pos)
+        start = max(start, self.write_pos - self.capacity, 0)
+        if start >= stop:
+            return self.data[:0]
+        
+        first = start % self.capacity
+        last = first + (stop - start)
+        if last <= self.capacity:
+            return self.data[first:last]
+        return np.concatenate((self.data[first:], self.data[:last - self.capacity]), axis=0)
+    
+    def latest(self, frames):
+        """Return the most recent frames (a view whenever possible)."""
+        return self.slice(self.write_pos - frames)
+    
+    def get(self):
+        """Return all buffered frames (a view whenever possible)."""
+        return self.slice(0)
+
+
+class Resampler:
+    """
+    Streaming polyphase resampler from a device's native rate to SAMPLE_RATE.
+    
+    Uses the same anti-aliasing filter as scipy.signal.resample_poly, applied
+    to each batch of frames with upfirdn. Enough input history is carried
+    between batches that the output is seamless across block boundaries.
+    """
+    
+    def __init__(self, input_rate, output_rate=SAMPLE_RATE, channels=CHANNELS):
+        divisor = gcd(int(input_rate), int(output_rate))
+        self.up = int(output_rate) // divisor
+        self.down = int(input_rate) // divisor
+        max_rate = max(self.up, self.down)
+        half_len = 10 * max_rate
+        self.taps = (firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * self.up).astype(np.float32)
+        self.pending = np.zeros((0, channels), dtype=np.float32)
+        self.pending_start = 0  # Input index of pending[0], always a multiple of self.down
+        self.next_output = 0  # Index of the next output frame to emit
+    
+    def process(self, block):
+        """
+        Resample a block of input frames.
+        
+        Returns:
+            np.ndarray: The output frames that can be computed so far (may be empty)
+        """
+        self.pending = np.concatenate((self.pending, block), axis=0)
+        total_input = self.pending_start + len(self.pending)
+        
+        # Last output frame whose newest input sample has arrived
+        last_output = (total_input - 1) * self.up // self.down
+        if last_output < self.next_output:
+            return self.pending[:0]
+        
+        # Because pending_start is a multiple of self.down, the local output
+        # grid of upfirdn lines up with the global one
+        base = self.pending_start * self.up // self.down
+        output = upfirdn(self.taps, self.pending, up=self.up, down=self.down, axis=0)
+        output = output[self.next_output - base:last_output - base + 1]
+        self.next_output = last_output + 1
+        
+        # Keep only the history needed for the next output frame
+        first_needed = max((self.next_output * self.down - len(self.taps) + 1) // self.up, 0)
+        first_needed -= first_needed % self.down
+        if first_needed > self.pending_start:
+            self.pending = self.pending[first_needed - self.pending_start:]
+            self.pending_start = first_needed
+        return output
+
+
+class SilenceDetector:
+    """Tracks a running windowed RMS level, updated incrementally per audio block."""
+    
+    def __init__(self, sample_rate, threshold=SILENCE_THRESHOLD,
+                 silence_duration=SILENCE_DURATION, window=1.0):
+        self.window_frames = int(window * sample_rate)
+        self.silence_frames_needed = int(silence_duration * sample_rate)
+        self.threshold = threshold
+        self.reset()
+    
+    def reset(self):
+        """Clear the energy window and the silence run."""
+        self.blocks = deque()  # (frames, samples, sum of squares) per block
+        self.window_frames_held = 0
+        self.window_samples = 0
+        self.window_energy = 0.0
+        self.silent_frames = 0
+        self.level = 0.0
+        self.block_level = 0.0
+        self.block_is_silent = True
+    
+    def update(self, block):
+        """
+        Add a block to the window and update the silence run.
+        
+        Args:
+            block (np.ndarray): Audio frames from the stream callback
+            
+        Returns:
+            bool: True once the silence duration has been satisfied
+        """
+        frames = len(block)
+        energy = float(np.vdot(block, block))
+        self.blocks.append((frames, block.size, energy))
+        self.window_frames_held += frames
+        self.window_samples += block.size
+        self.window_energy += energy
+        self.block_level = np.sqrt(energy / block.size)
+        self.block_is_silent = self.block_level < self.threshold
+        
+        # Drop blocks that have fallen out of the window
+        while self.window_frames_held - self.blocks[0][0] >= self.window_frames:
+            old_frames, old_samples, old_energy = self.blocks.popleft()
+            self.window_frames_held -= old_frames
+            self.window_samples -= old_samples
+            self.window_energy -= old_energy
+        
+        self.level = np.sqrt(max(self.window_energy, 0.0) / self.window_samples)
+        if self.level < self.threshold:
+            self.silent_frames += frames
+        else:
+            self.silent_frames = 0
+        
+        return self.silent_frames >= self.silence_frames_needed
+
+
+class AdaptiveEndpointer:
+    """
+    Endpointer that adapts to the room's noise floor.
+    
+    The noise floor is estimated from the first blocks and then tracked
+    (following drops immediately, rising slowly). Blocks well above it count
+    as speech. After a clear utterance - enough speech followed by a deep
+    energy drop - the hangover is shortened from SILENCE_DURATION to
+    MIN_SILENCE_DURATION.
+    """
+    
+    def __init__(self, sample_rate, silence_duration=SILENCE_DURATION,
+                 min_silence_duration=MIN_SILENCE_DURATION, calibration=0.25,
+                 snr=3.0, min_threshold=0.002, noise_rise=0.2,
+                 long_speech=1.0, deep_drop=0.1):
+        self.sample_rate = sample_rate
+        self.calibration_frames = int(calibration * sample_rate)
+        self.max_hangover = int(silence_duration * sample_rate)
+        self.min_hangover = int(min_silence_duration * sample_rate)
+        self.long_speech_frames = int(long_speech * sample_rate)
+        self.snr = snr  # Speech must be this many times louder than the noise floor
+        self.min_threshold = min_threshold
+        self.noise_rise = noise_rise  # Relative noise floor rise per second
+        self.deep_drop = deep_drop  # Level ratio (vs. speech) that marks a clear end
+        self.reset()
+    
+    def reset(self):
+        """Forget the noise estimate and the current utterance."""
+        self.frames_seen = 0
+        self.calibration_levels = []
+        self.noise_level = 0.0
+        self.speech_level = 0.0
+        self.speech_frames = 0
+        self.silent_frames = 0
+        self.deep_silent_frames = 0
+        self.level = 0.0
+        self.block_level = 0.0
+        self.block_is_silent = True
+    
+    @property
+    def threshold(self):
+        """Current speech/non-speech level threshold."""
+        return max(self.noise_level * self.snr, self.min_threshold)
+    
+    def update(self, block):
+        """
+        Classify a block and update the silence run.
+        
+        Args:
+            block (np.ndarray): Audio frames from the stream callback
+            
+        Returns:
+            bool: True once the (adaptive) hangover has been satisfied
+        """
+        frames = len(block)
+        self.frames_seen += frames
+        self.level = self.block_level = float(np.sqrt(np.vdot(block, block) / block.size))
+        
+        # Estimate the initial noise floor; never stop during calibration
+        if self.frames_seen <= self.calibration_frames or not self.calibration_levels:
+            self.calibration_levels.append(self.level)
+            self.noise_level = float(np.median(self.calibration_levels))
+            self.block_is_silent = False
+            return False
+        
+        # Track the noise floor: follow drops immediately, rise slowly
+        if self.level < self.noise_level:
+            self.noise_level = self.level
+        else:
+            self.noise_level *= 1.0 + self.noise_rise * frames / self.sample_rate
+        
+        self.block_is_silent = self.level < self.threshold
+        if not self.block_is_silent:
+            self.speech_frames += frames
+            if self.speech_level == 0.0:
+                self.speech_level = self.level
+            else:
+                self.speech_level = self.speech_level * 0.9 + self.level * 0.1
+            self.silent_frames = 0
+            self.deep_silent_frames = 0
+            return False
+        
+        self.silent_frames += frames
+        if self.level < self.speech_level * self.deep_drop:
+            self.deep_silent_frames += frames
+        else:
+            self.deep_silent_frames = 0
+        
+        # Shorten the hangover when the utterance clearly ended
+        if self.speech_frames >= self.long_speech_frames and self.deep_silent_frames == self.silent_frames:
+            hangover = self.min_hangover
+        else:
+            hangover = self.max_hangover
+        return self.silent_frames >= hangover
+
+
 class AudioRecorder:
     """Records audio from the microphone with silence detection."""
     
     def __init__(self):
         self.is_recording = False
-        self.audio_data = []
         self.sample_rate = SAMPLE_RATE
         self.channels = CHANNELS
+        self.preroll_frames = int(PREROLL_DURATION * self.sample_rate)
+        # Preallocate room for the longest allowed recording plus a second of
+        # slack and the pre-roll kept by a warm stream
+        self.buffer = RingBuffer(
+            (MAX_RECORDING_DURATION + 1) * self.sample_rate + self.preroll_frames,
+            channels=self.channels,
+            spool_dir=SPOOL_DIR if SPOOL_TO_DISK else None
+        )
+        self.max_frames = MAX_RECORDING_DURATION * self.sample_rate
+        if ADAPTIVE_ENDPOINTING:
+            self.silence_detector = AdaptiveEndpointer(self.sample_rate)
+        else:
+            self.silence_detector = SilenceDetector(self.sample_rate)
+        # Buffer positions where the current recording starts and stops
+        self.start_pos = 0
+        self.stop_pos = 0
+        # Seconds of audio in the last recording, before and after trimming
+        self.recorded_duration = 0.0
+        self.sent_duration = 0.0
+        # Segmented (streaming) transcription: on_segment(start, stop) is called
+        # from the audio callback whenever a segment is cut at a pause
+        self.on_segment = None
+        self.segment_start = 0
+        self.pause_frames = 0
+        self.min_segment_frames = int(STREAMING_MIN_SEGMENT * self.sample_rate)
+        self.pause_frames_needed = int(STREAMING_PAUSE_DURATION * self.sample_rate)
+        # Input stream kept open between recordings (warm mode only)
+        self.stream = None
+        # Converts native-rate device audio to SAMPLE_RATE (CAPTURE_NATIVE_RATE only)
+        self.resampler = None
+        # Set from the audio callback (or by stop_recording) to end the recording
+        self.stop_event = threading.Event()
+        # Held by the audio callback while writing, so a warm buffer can be realigned
+        self.buffer_lock = threading.Lock()
+        # Set once the input stream has been closed and the recording thread is done
+        self.finished = threading.Event()
         self.recording_thread = None
+    
+    def open_stream(self):
+        """
+        Keep an input stream open so recordings start instantly.
+        
+        While the stream is warm, audio is continuously written to the ring
+        buffer and each recording includes PREROLL_DURATION seconds of audio
+        captured before it was started.
+        
+        Returns:
+            bool: True if the stream is open, False otherwise
+        """
+        if self.stream is not None:
+            return True
         
+        self.buffer.reset()
+        try:
+            self.stream = self._create_stream()
+            self.stream.start()
+        except Exception as e:
+            print(f"Error opening input stream: {e}")
+            self.stream = None
+            return False
+        
+        print("Input stream is warm.")
+        return True
+    
+    def close_stream(self):
+        """Close the warm input stream, if one is open."""
+        if self.stream is None:
+            return
+        
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception as e:
+            print(f"Error closing input stream: {e}")
+        finally:
+            self.stream = None
+    
     def start_recording(self):
         """Start recording audio from the microphone."""
         if self.is_recording:
             print("Already recording!")
             return False
         
+        self.silence_detector.reset()
+        self.stop_event.clear()
+        self.finished.clear()
+        if self.stream is not None:
+            # Warm stream: keep the pre-roll and move it to the start of the
+            # buffer, so the recording can be read without joining wrapped halves
+            with self.buffer_lock:
+                self.buffer.realign(self.preroll_frames)
+        else:
+            self.buffer.reset()
+        self.start_pos = self.segment_start = 0
+        self.pause_frames = 0
+        
         self.is_recording = True
-        self.audio_data = []
         self.recording_thread = threading.Thread(target=self._record)
         self.recording_thread.start()
         return True
     
     def stop_recording(self):
-        """Stop recording and save the audio file."""
-        # Set flag to false to stop the recording loop
+        """
+        Stop recording and export the audio.
+        
+        Returns:
+            bytes: The recording encoded as UPLOAD_ENCODING, or None if nothing was
+                recorded or no speech was found
+        """
+        # Set flag to false and wake the recording thread
         self.is_recording = False
+        self.stop_event.set()
         
         # Wait for recording thread to finish
         if self.recording_thread and self.recording_thread.is_alive():
             self.recording_thread.join(timeout=5)
         
-        # Check if we have audio data (even if recording already stopped)
-        if len(self.audio_data) == 0:
+        # Check if we have audio data (even if recording already stopped).
+        # Segments already handed to on_segment are not exported again.
+        audio_array = self.buffer.slice(self.segment_start, self.stop_pos)
+        try:
+            return self._export(audio_array)
+        finally:
+            # The buffer is left intact so segments of this recording can still
+            # be exported; the next cold start_recording() resets it
+            self.start_pos = self.stop_pos = self.segment_start = self.buffer.write_pos
+    
+    def export_segment(self, start, stop):
+        """
+        Trim and encode a segment of the current recording.
+        
+        Args:
+            start (int): Buffer position where the segment starts
+            stop (int): Buffer position where the segment ends
+            
+        Returns:
+            bytes: The encoded segment, or None if it contains no speech
+        """
+        audio_array = self.buffer.slice(start, stop)
+        if TRIM_SILENCE:
+            audio_array = trim_silence(audio_array, self.sample_rate, threshold=self.silence_detector.threshold)
+        if audio_array is None or len(audio_array) == 0:
+            return None
+        return encode_audio(audio_array, self.sample_rate)
+    
+    def _export(self, audio_array):
+        """Trim and encode a recording, returning None if there is nothing to transcribe."""
+        self.recorded_duration = len(audio_array) / self.sample_rate
+        self.sent_duration = 0.0
+        if len(audio_array) == 0:
             print("No audio data recorded.")
             return None
         
-        # Combine all audio chunks
-        audio_array = np.concatenate(self.audio_data, axis=0)
+        if TRIM_SILENCE:
+            # Trim at the level the endpointer used, so a quiet mic that
+            # adaptive endpointing accepts as speech is not dropped here
+            audio_array = trim_silence(audio_array, self.sample_rate, threshold=self.silence_detector.threshold)
+            if audio_array is None:
+                print("No speech detected, nothing to transcribe.")
+                return None
+        self.sent_duration = len(audio_array) / self.sample_rate
+        
+        # Export the buffered audio (a view, no concatenation) in the upload encoding
+        audio_data = encode_audio(audio_array, self.sample_rate)
         
-        # Save to WAV file
-        wavfile.write(TEMP_AUDIO_FILE, self.sample_rate, audio_array)
-        print(f"Audio saved to {TEMP_AUDIO_FILE}")
+        if SAVE_AUDIO_FILE:
+            with open(TEMP_AUDIO_FILE, 'wb') as f:
+                f.write(audio_data)
+            print(f"Audio saved to {TEMP_AUDIO_FILE}")
         
-        # Clear audio data for next recording
-        self.audio_data = []
+        return audio_data
+    
+    def _create_stream(self):
+        """Create the input stream that feeds the audio callback."""
+        capture_rate = self.sample_rate
+        if CAPTURE_NATIVE_RATE:
+            # Let the device run at its own rate and resample here instead
+            capture_rate = int(sd.query_devices(kind='input')['default_samplerate'])
+        self.resampler = None
+        if capture_rate != self.sample_rate:
+            self.resampler = Resampler(capture_rate, self.sample_rate, self.channels)
         
-        return TEMP_AUDIO_FILE
+        return sd.InputStream(
+            samplerate=capture_rate,
+            channels=self.channels,
+            callback=self._callback,
+            dtype='float32'
+        )
+    
+    def _callback(self, indata, frames, time_info, status):
+        """Called by sounddevice for each audio block."""
+        if status:
+            print(f"Status: {status}")
+        
+        if self.resampler is not None:
+            indata = self.resampler.process(indata)
+            if len(indata) == 0:
+                return
+        
+        # Store audio data
+        with self.buffer_lock:
+            self.buffer.write(indata)
+        
+        if not self.is_recording or self.stop_event.is_set():
+            return
+        
+        # Update the running audio level and end the recording as soon as
+        # the silence window is satisfied
+        if self.silence_detector.update(indata):
+            print("Silence detected, stopping recording.")
+            self.stop_event.set()
+        elif self.buffer.write_pos - self.start_pos >= self.max_frames:
+            print("Max recording duration reached.")
+            self.stop_event.set()
+        elif self.on_segment is not None:
+            self._update_segments(len(indata))
+    
+    def _update_segments(self, frames):
+        """Cut the recording at a natural pause once the current segment is long enough."""
+        if self.silence_detector.block_is_silent:
+            self.pause_frames += frames
+        else:
+            self.pause_frames = 0
+        
+        write_pos = self.buffer.write_pos
+        if (write_pos - self.segment_start >= self.min_segment_frames
+                and self.pause_frames >= self.pause_frames_needed):
+            # Cut in the middle of the pause
+            cut = write_pos - self.pause_frames // 2
+            self.on_segment(self.segment_start, cut)
+            self.segment_start = cut
+            self.pause_frames = 0
     
     def _record(self):
         """Internal method to record audio with silence detection."""
         print("Recording started...")
-        silence_start = None
-        start_time = time.time()
-        
-        def callback(indata, frames, time_info, status):
-            """Called by sounddevice for each audio block."""
-            if status:
-                print(f"Status: {status}")
-            
-            # Calculate audio level (RMS)
-            audio_level = np.sqrt(np.mean(indata**2))
-            
-            # Store audio data
-            self.audio_data.append(indata.copy())
         
         try:
-            with sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=self.channels,
-                callback=callback,
-                dtype='float32'
-            ):
-                last_check = time.time()
-                while self.is_recording:
-                    current_time = time.time()
-                    
-                    # Check if max duration exceeded
-                    if current_time - start_time > MAX_RECORDING_DURATION:
-                        print("Max recording duration reached.")
-                        break
-                    
-                    # Check silence detection every 0.1 seconds
-                    if current_time - last_check > 0.1:
-                        if len(self.audio_data) > 0:
-                            # Get recent audio for silence detection
-                            recent_audio = self.audio_data[-10:]  # Last ~1 second
-                            if len(recent_audio) > 0:
-                                recent_array = np.concatenate(recent_audio, axis=0)
-                                audio_level = np.sqrt(np.mean(recent_array**2))
-                                
-                                # Detect silence
-                                if audio_level < SILENCE_THRESHOLD:
-                                    if silence_start is None:
-                                        silence_start = current_time
-                                    elif current_time - silence_start > SILENCE_DURATION:
-                                        print("Silence detected, stopping recording.")
-                                        break
-                                else:
-                                    silence_start = None
-                        
-                        last_check = current_time
-                    
-                    time.sleep(0.1)
+            if self.stream is not None:
+                # Wall-clock limit as a safety net in case the device stalls
+                self.stop_event.wait(timeout=MAX_RECORDING_DURATION + 1)
+            else:
+                with self._create_stream():
+                    self.stop_event.wait(timeout=MAX_RECORDING_DURATION + 1)
         
         except Exception as e:
             print(f"Error during recording: {e}")
         finally:
+            self.stop_pos = self.buffer.write_pos
             self.is_recording = False
+            self.finished.set()
             print("Recording stopped.")
 
 
@@ -135,12 +693,14 @@ if __name__ == "__main__":
     
     try:
         # Wait for recording to finish (either by silence or max duration)
-        while recorder.is_recording:
-            time.sleep(0.5)
+        while not recorder.finished.wait(timeout=0.5):
+            pass
     except KeyboardInterrupt:
         print("\nStopping...")
     
-    audio_file = recorder.stop_recording()
-    if audio_file:
-        print(f"Recording saved to: {audio_file}")
+    audio_data = recorder.stop_recording()
+    if audio_data:
+        with open(TEMP_AUDIO_FILE, 'wb') as f:
+            f.write(audio_data)
+        print(f"Recording saved to: {TEMP_AUDIO_FILE}")
 
@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+AnyWhisper Benchmarks
+
+Offline micro-benchmarks for the recording and transcription pipeline.
+None of them need a microphone; audio is synthesized on the fly.
+
+Usage: python benchmark.py <benchmark> [options]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import scipy.io.wavfile as wavfile
+
+from config import SAMPLE_RATE, CHANNELS
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the Whisper API with a configurable processing delay."""
+    
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like uvicorn
+    disable_nagle_algorithm = True
+    delay = 0.0
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _reply(self, body, status=200):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def do_GET(self):
+        self._reply({"status": "ok"})
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.delay)
+        self._reply({"text": " stand-in transcription."})
+
+
+def start_stand_in_server(handler=StandInHandler):
+    """Serve a stand-in API on a free local port; returns (server, transcription URL)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1/audio/transcriptions"
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else float('nan')
+
+
+def _synthetic_blocks(duration, blocksize=1024):
+    """Yield float32 blocks of noisy speech-like audio, as a stream callback would."""
+    rng = np.random.default_rng(0)
+    total = int(duration * SAMPLE_RATE)
+    for start in range(0, total, blocksize):
+        frames = min(blocksize, total - start)
+        yield (rng.standard_normal((frames, CHANNELS)) * 0.1).astype('float32')
+
+
+def _record_list(duration, path):
+    """Previous recorder behaviour: list of copied chunks, re-concatenated."""
+    audio_data = []
+    blocks_per_check = max(1, int(0.1 * SAMPLE_RATE / 1024))
+    for i, block in enumerate(_synthetic_blocks(duration)):
+        audio_data.append(block.copy())
+        if i % blocks_per_check == 0:
+            recent_array = np.concatenate(audio_data[-10:], axis=0)
+            np.sqrt(np.mean(recent_array**2))
+    live = _live_blocks()
+    start = time.perf_counter()
+    wavfile.write(path, SAMPLE_RATE, np.concatenate(audio_data, axis=0))
+    return live, time.perf_counter() - start
+
+
+def _record_ring(duration, path):
+    """Current recorder behaviour: preallocated ring buffer written in place."""
+    from audio_recorder import RingBuffer
+    
+    buffer = RingBuffer(int(duration + 1) * SAMPLE_RATE, channels=CHANNELS)
+    blocks_per_check = max(1, int(0.1 * SAMPLE_RATE / 1024))
+    for i, block in enumerate(_synthetic_blocks(duration)):
+        buffer.write(block)
+        if i % blocks_per_check == 0:
+            recent_array = buffer.latest(SAMPLE_RATE)
+            np.sqrt(np.mean(recent_array**2))
+    live = _live_blocks()
+    start = time.perf_counter()
+    wavfile.write(path, SAMPLE_RATE, buffer.get())
+    return live, time.perf_counter() - start
+
+
+def _live_blocks():
+    """Number of memory blocks currently traced by tracemalloc."""
+    return sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+
+
+def bench_recorder(args):
+    """Compare list-of-chunks recording with the preallocated ring buffer."""
+    import audio_recorder  # Imported up front so module setup is not traced
+    
+    path = os.path.join(tempfile.gettempdir(), 'anywhisper_bench.wav')
+    print(f"{'duration':>9} {'method':>6} {'live blocks':>12} {'peak MB':>8} {'stop->file ms':>14}")
+    for duration in args.durations:
+        for name, func in (('list', _record_list), ('ring', _record_ring)):
+            tracemalloc.start()
+            live, latency = func(duration, path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{duration:>8}s {name:>6} {live:>12} {peak / 1e6:>8.1f} {latency * 1000:>14.2f}")
+    os.remove(path)
+
+
+def bench_encode(args):
+    """Report payload size and encode time for each upload encoding."""
+    from audio_recorder import encode_audio
+    
+    print(f"{'duration':>9} {'encoding':>12} {'size KB':>9} {'ratio':>6} {'encode ms':>10}")
+    for duration in args.durations:
+        audio_array = np.concatenate(list(_synthetic_blocks(duration)), axis=0)
+        baseline = None
+        for encoding in ('wav_float32', 'wav_int16', 'flac', 'opus'):
+            start = time.perf_counter()
+            payload = encode_audio(audio_array, SAMPLE_RATE, encoding)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or len(payload)
+            print(f"{duration:>8}s {encoding:>12} {len(payload) / 1024:>9.1f} "
+                  f"{baseline / len(payload):>6.1f} {elapsed * 1000:>10.2f}")
+
+
+def bench_preprocess(args):
+    """Server-side preprocessing time for WAV uploads vs. raw PCM (needs faster-whisper and fastapi)."""
+    from audio_recorder import encode_audio
+    from whisper_server import decode_file, decode_pcm
+    
+    print(f"{'duration':>9} {'upload':>12} {'p50 ms':>8} {'p95 ms':>8}")
+    for duration in args.durations:
+        audio_array = np.concatenate(list(_synthetic_blocks(duration)), axis=0)
+        paths = (
+            ('wav_int16', decode_file),
+            ('pcm_int16', lambda payload: decode_pcm(payload, 'int16')),
+            ('pcm_float32', lambda payload: decode_pcm(payload, 'float32')),
+        )
+        for encoding, preprocess in paths:
+            payload = encode_audio(audio_array, SAMPLE_RATE, encoding)
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                preprocess(payload)
+                timings.append(time.perf_counter() - start)
+            print(f"{duration:>8}s {encoding:>12} {_percentile(timings, 50):>8.2f} {_percentile(timings, 95):>8.2f}")
+
+
+def _rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Peak, not current
+
+
+def bench_tune(args):
+    """Run a WAV corpus through the server's transcribe path across model/compute/decoding settings."""
+    import gc
+    import itertools
+    from faster_whisper import WhisperModel
+    from whisper_server import decode_file
+    
+    corpus = []
+    for name in sorted(os.listdir(args.corpus)):
+        if name.lower().endswith('.wav'):
+            with open(os.path.join(args.corpus, name), 'rb') as wav_file:
+                audio = decode_file(wav_file.read())
+            corpus.append((audio, len(audio) / 16000))
+    if not corpus:
+        print(f"No .wav files in {args.corpus}")
+        return
+    print(f"{len(corpus)} clips, {sum(duration for _, duration in corpus):.1f}s of audio")
+    
+    print(f"{'model':>9} {'compute':>8} {'threads':>7} {'beam':>4} {'vad':>5} "
+          f"{'RTF':>6} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>7}")
+    for model_size, compute_type, cpu_threads in itertools.product(args.models, args.compute_types, args.threads):
+        model = WhisperModel(model_size, device='cpu', compute_type=compute_type, cpu_threads=cpu_threads)
+        for beam_size, vad_filter in itertools.product(args.beam_sizes, args.vad):
+            latencies = []
+            for audio, duration in corpus * args.repeats:
+                start = time.perf_counter()
+                segments, _ = model.transcribe(audio, language=args.language, beam_size=beam_size,
+                                               vad_filter=vad_filter == 'on')
+                list(segments)
+                latencies.append(time.perf_counter() - start)
+            processing = sum(latencies)
+            audio_seconds = sum(duration for _, duration in corpus) * args.repeats
+            print(f"{model_size:>9} {compute_type:>8} {cpu_threads:>7} {beam_size:>4} {vad_filter:>5} "
+                  f"{processing / audio_seconds:>6.3f} {_percentile(latencies, 50):>8.0f} "
+                  f"{_percentile(latencies, 95):>8.0f} {_rss_mb():>7.0f}")
+        del model
+        gc.collect()
+
+
+def _synthetic_utterance(rng, noise_level, lead=0.5, tail=6.0):
+    """
+    Build a synthetic dictation: noise, bursty speech with word pauses, then noise.
+    
+    Returns:
+        tuple: (float32 frames, frame index where speech ends)
+    """
+    pieces = [np.zeros(int(lead * SAMPLE_RATE))]
+    for _ in range(rng.integers(3, 15)):
+        for _ in range(rng.integers(1, 4)):  # Syllables of a word
+            syllable = int(rng.uniform(0.1, 0.3) * SAMPLE_RATE)
+            envelope = np.sin(np.linspace(0, np.pi, syllable))
+            pieces.append(rng.standard_normal(syllable) * envelope * rng.uniform(0.05, 0.3))
+        pause = rng.uniform(0.05, 0.25) if rng.random() < 0.85 else rng.uniform(0.3, 0.6)
+        pieces.append(np.zeros(int(pause * SAMPLE_RATE)))
+    speech_end = sum(len(piece) for piece in pieces[:-1])
+    pieces[-1] = np.zeros(int(tail * SAMPLE_RATE))
+    audio = np.concatenate(pieces).astype('float32').reshape(-1, 1)
+    return np.clip(audio + rng.standard_normal(audio.shape).astype('float32') * noise_level, -1, 1), speech_end
+
+
+def _run_endpointer(detector, audio, blocksize=512):
+    """Feed audio to a detector block by block; return the frame where it stopped, or None."""
+    detector.reset()
+    for start in range(0, len(audio), blocksize):
+        if detector.update(audio[start:start + blocksize]):
+            return start + blocksize
+    return None
+
+
+def bench_endpoint(args):
+    """Evaluate stop latency and premature cuts of the fixed and adaptive endpointers."""
+    from audio_recorder import SilenceDetector, AdaptiveEndpointer
+    
+    rng = np.random.default_rng(args.seed)
+    detectors = (('fixed', SilenceDetector(SAMPLE_RATE)), ('adaptive', AdaptiveEndpointer(SAMPLE_RATE)))
+    print(f"{'noise':>6} {'endpointer':>10} {'mean stop latency s':>20} {'premature %':>12} {'never stopped %':>16}")
+    for noise_level in args.noise_levels:
+        clips = [_synthetic_utterance(rng, noise_level) for _ in range(args.clips)]
+        for name, detector in detectors:
+            latencies, premature, never = [], 0, 0
+            for audio, speech_end in clips:
+                stop = _run_endpointer(detector, audio)
+                if stop is None:
+                    never += 1
+                elif stop < speech_end:
+                    premature += 1
+                else:
+                    latencies.append((stop - speech_end) / SAMPLE_RATE)
+            mean_latency = f"{np.mean(latencies):.2f}" if latencies else "-"
+            print(f"{noise_level:>6} {name:>10} {mean_latency:>20} {100 * premature / len(clips):>12.1f} "
+                  f"{100 * never / len(clips):>16.1f}")
+
+
+def bench_resample(args):
+    """Measure CPU cost of streaming resampling from native device rates to 16 kHz."""
+    from audio_recorder import Resampler
+    
+    rng = np.random.default_rng(0)
+    print(f"{'input rate':>10} {'block':>6} {'CPU ms per audio s':>19} {'realtime x':>11}")
+    for rate in args.rates:
+        audio = (rng.standard_normal((int(rate * args.duration), CHANNELS)) * 0.1).astype('float32')
+        for blocksize in args.blocksizes:
+            resampler = Resampler(rate, SAMPLE_RATE, CHANNELS)
+            start = time.process_time()
+            for offset in range(0, len(audio), blocksize):
+                resampler.process(audio[offset:offset + blocksize])
+            elapsed = time.process_time() - start
+            print(f"{rate:>10} {blocksize:>6} {elapsed * 1000 / args.duration:>19.3f} "
+                  f"{args.duration / max(elapsed, 1e-9):>11.0f}")
+
+
+def bench_http(args):
+    """Compare per-request latency with a fresh connection vs. the client's warm session."""
+    from api_client import WhisperAPIClient
+    from audio_recorder import encode_audio
+    
+    server, url = start_stand_in_server()
+    audio_data = encode_audio(np.concatenate(list(_synthetic_blocks(2)), axis=0), SAMPLE_RATE)
+    warm_client = WhisperAPIClient(url)
+    warm_client.cache = None  # Every request re-sends the same audio; time the server, not cache hits
+    warm_client.check_api_health()
+    
+    print(f"{'connection':>10} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for name in ('cold', 'warm'):
+        latencies = []
+        for _ in range(args.requests):
+            if name == 'cold':
+                client = WhisperAPIClient(url)
+                client.cache = None
+            else:
+                client = warm_client
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                client.transcribe_audio(audio_data)
+            latencies.append(time.perf_counter() - start)
+            if name == 'cold':
+                client.session.close()
+        print(f"{name:>10} {_percentile(latencies, 50):>8.2f} {_percentile(latencies, 95):>8.2f} "
+              f"{np.mean(latencies) * 1000:>8.2f}")
+    server.shutdown()
+
+
+class TailLatencyHandler(StandInHandler):
+    """Stand-in that usually answers in 50 ms but stalls for a second 3% of the time."""
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(1.0 if np.random.random() < 0.03 else 0.05)
+        self._reply({"text": " stand-in transcription."})
+
+
+def bench_pool(args):
+    """Latency across a server pool with a dead and a slow-tail server, with and without hedging."""
+    import api_client
+    
+    servers, urls = zip(*(start_stand_in_server(TailLatencyHandler) for _ in range(2)))
+    urls = ["http://127.0.0.1:1/v1/audio/transcriptions"] + list(urls)  # Nothing listens here
+    audio_data = b'RIFF' + bytes(64000)
+    
+    print(f"{'hedging':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for hedging in (False, True):
+        api_client.HEDGE_REQUESTS = hedging
+        client = api_client.WhisperAPIClient(urls)
+        client.cache = None  # Every request re-sends the same audio; time the servers, not cache hits
+        latencies, failed = [], 0
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                failed += client.transcribe_audio(audio_data) is None
+            latencies.append(time.perf_counter() - start)
+        print(f"{str(hedging):>8} {_percentile(latencies, 50):>8.1f} {_percentile(latencies, 95):>8.1f} "
+              f"{_percentile(latencies, 99):>8.1f} {failed:>7}")
+    for server in servers:
+        server.shutdown()
+
+
+def _command_patterns(count):
+    """Build a command set like a large macro library: mostly 'phrase$' commands, some regexes and triggers."""
+    patterns = {}
+    for i in range(count):
+        if i % 10 == 8:
+            patterns[rf'snippet {i} (one|two|three)$'] = f'SNIPPET_{i}'
+        elif i % 10 == 9:
+            patterns[f'macro {i} please'] = f'TEMPLATE_{i}'
+        else:
+            patterns[f'run macro number {i}$'] = f'MACRO_{i}'
+    return patterns
+
+
+def _match_loop(patterns, text, opt_dot=True):
+    """The per-transcription loop the daemon used before CommandMatcher."""
+    for pattern, value in patterns.items():
+        modified_pattern = pattern
+        if opt_dot and pattern.endswith('$'):
+            modified_pattern = pattern[:-1] + r'\.?$'
+        if re.search(modified_pattern, text, re.IGNORECASE):
+            return value, pattern, re.sub(modified_pattern, '', text, flags=re.IGNORECASE).strip()
+    return None
+
+
+def bench_commands(args):
+    """Time matching a transcription against 10/100/1000 command patterns: pattern loop vs. CommandMatcher."""
+    from command_matcher import CommandMatcher
+    from config import POST_TRANSCRIPTION_ACTIONS, POST_AI_TRIGGERS
+    
+    # The shipped commands are plain phrases and must take the lookup paths, not the regex loop
+    for patterns, opt_dot in ((POST_TRANSCRIPTION_ACTIONS, True), (POST_AI_TRIGGERS, False)):
+        matcher = CommandMatcher(patterns, opt_dot=opt_dot)
+        assert not matcher.regexes, [matcher.patterns[index][0] for index, _ in matcher.regexes]
+    assert CommandMatcher(POST_TRANSCRIPTION_ACTIONS).suffix_trie and CommandMatcher(POST_TRANSCRIPTION_ACTIONS).exact
+    
+    print(f"{'patterns':>8} {'text':>9} {'loop us':>9} {'matcher us':>10} {'speedup':>8} {'build ms':>9}")
+    for count in args.counts:
+        patterns = _command_patterns(count)
+        start = time.perf_counter()
+        matcher = CommandMatcher(patterns, opt_dot=True)
+        build = time.perf_counter() - start
+        texts = {
+            'no match': "So I think we should ship the release on Friday after the review.",
+            'first': "Okay now run macro number 0.",
+            'last': f"Okay now run macro number {count - 1}.",
+            'regex': f"Paste snippet {count - 2} two",
+            'phrase': f"Macro {count - 1} please, and again macro {count - 1} please",
+        }
+        for name, text in texts.items():
+            assert matcher.match(text) == _match_loop(patterns, text), name
+            timings = {}
+            for label, func in (('loop', lambda: _match_loop(patterns, text)), ('matcher', lambda: matcher.match(text))):
+                start = time.perf_counter()
+                for _ in range(args.repeats):
+                    func()
+                timings[label] = (time.perf_counter() - start) / args.repeats * 1e6
+            print(f"{count:>8} {name:>9} {timings['loop']:>9.1f} {timings['matcher']:>10.1f} "
+                  f"{timings['loop'] / timings['matcher']:>7.1f}x {build * 1000:>9.2f}")
+
+
+def _control_client(socket_path, commands, persistent, latencies, errors):
+    """Send STATUS/PING commands to the daemon, timing each round trip."""
+    import socket
+    
+    client = None
+    for i in range(commands):
+        command = b'STATUS\n' if i % 2 else b'PING\n'
+        start = time.perf_counter()
+        try:
+            if client is None:
+                client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                client.connect(socket_path)
+            client.sendall(command)
+            response = b''
+            while not response.endswith(b'\n'):
+                chunk = client.recv(64)
+                if not chunk:
+                    raise ConnectionError("connection closed")
+                response += chunk
+        except OSError:
+            errors.append(1)
+            client = None
+            continue
+        latencies.append(time.perf_counter() - start)
+        if not persistent:
+            client.close()
+            client = None
+    if client is not None:
+        client.close()
+
+
+def bench_control(args):
+    """Load test the running daemon's control socket with STATUS/PING commands."""
+    from voice_trigger import SOCKET_PATH
+    
+    socket_path = args.socket or SOCKET_PATH
+    if not os.path.exists(socket_path):
+        print(f"No daemon socket at {socket_path}; start voice_daemon.py first")
+        return
+    
+    print(f"{'connections':>11} {'clients':>7} {'commands':>8} {'cmd/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for persistent in (False, True):
+        for clients in args.clients:
+            latencies, errors = [], []
+            threads = [threading.Thread(target=_control_client,
+                                        args=(socket_path, args.commands, persistent, latencies, errors))
+                       for _ in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            mode = 'persistent' if persistent else 'per-cmd'
+            print(f"{mode:>11} {clients:>7} {len(latencies):>8} {len(latencies) / elapsed:>8.0f} "
+                  f"{_percentile(latencies, 50):>8.3f} {_percentile(latencies, 99):>8.3f} {len(errors):>6}")
+
+
+AI_STAND_IN_OUTPUT = """Here is the extended plan for the settings page.
+
+1. Add a form with the display name, email and avatar fields. Validate the email on blur and show inline errors.
+2. Save changes through the existing profile endpoint. Disable the button while the request is in flight.
+3. Add a danger zone section for deleting the account, behind a confirmation dialog.
+
+Once this works, add tests for the validation rules and the failure states of the save request."""
+
+
+def _stand_in_token_stream(text, first_token, per_token, token_chars=4):
+    """Emit text as an LLM would: a first-token delay, then a small fragment every per_token seconds."""
+    time.sleep(first_token)
+    for i in range(0, len(text), token_chars):
+        if i:
+            time.sleep(per_token)
+        yield text[i:i + token_chars]
+
+
+def bench_ai_stream(args):
+    """Time to first injected character for AI output: whole completion vs. streamed batches, with a stand-in token stream."""
+    from text_injector import TextInjector
+    
+    class RecordingInjector(TextInjector):
+        """Records when each injection happens instead of typing."""
+        
+        def __init__(self):
+            self.method = 'x11'
+            self.injections = []
+        
+        def inject_text(self, text, post_action=None):
+            self.injections.append((time.perf_counter(), text))
+            time.sleep(args.inject_delay)
+            return True
+    
+    tokens = len(range(0, len(AI_STAND_IN_OUTPUT), 4))
+    print(f"Stand-in stream: {len(AI_STAND_IN_OUTPUT)} chars in {tokens} tokens, "
+          f"first token {args.first_token * 1000:.0f} ms, then {args.per_token * 1000:.0f} ms/token")
+    print(f"{'mode':>8} {'first char ms':>13} {'done ms':>8} {'injections':>10}")
+    for mode in ('whole', 'streamed'):
+        injector = RecordingInjector()
+        stream = _stand_in_token_stream(AI_STAND_IN_OUTPUT, args.first_token, args.per_token)
+        start = time.perf_counter()
+        if mode == 'whole':
+            text = ''.join(stream).strip()
+            injector.inject_text(text)
+        else:
+            injector.inject_stream(stream)
+        done = time.perf_counter() - start
+        first = injector.injections[0][0] - start
+        print(f"{mode:>8} {first * 1000:>13.0f} {done * 1000:>8.0f} {len(injector.injections):>10}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="AnyWhisper benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    recorder = subparsers.add_parser('recorder', help=bench_recorder.__doc__)
+    recorder.add_argument('--durations', type=float, nargs='+', default=[5, 60, 240])
+    recorder.set_defaults(func=bench_recorder)
+    
+    
+    encode = subparsers.add_parser('encode', help=bench_encode.__doc__)
+    encode.add_argument('--durations', type=float, nargs='+', default=[5, 60, 240])
+    encode.set_defaults(func=bench_encode)
+    
+    endpoint = subparsers.add_parser('endpoint', help=bench_endpoint.__doc__)
+    endpoint.add_argument('--noise-levels', type=float, nargs='+', default=[0.001, 0.005, 0.02])
+    endpoint.add_argument('--clips', type=int, default=50)
+    endpoint.add_argument('--seed', type=int, default=0)
+    endpoint.set_defaults(func=bench_endpoint)
+    
+    resample = subparsers.add_parser('resample', help=bench_resample.__doc__)
+    resample.add_argument('--rates', type=int, nargs='+', default=[44100, 48000])
+    resample.add_argument('--blocksizes', type=int, nargs='+', default=[512, 2048])
+    resample.add_argument('--duration', type=float, default=30)
+    resample.set_defaults(func=bench_resample)
+    
+    preprocess = subparsers.add_parser('preprocess', help=bench_preprocess.__doc__)
+    preprocess.add_argument('--durations', type=float, nargs='+', default=[5, 30, 120])
+    preprocess.add_argument('--repeats', type=int, default=20)
+    preprocess.set_defaults(func=bench_preprocess)
+    
+    tune = subparsers.add_parser('tune', help=bench_tune.__doc__)
+    tune.add_argument('--corpus', required=True, help="Directory of .wav clips")
+    tune.add_argument('--models', nargs='+', default=['tiny', 'base', 'small'])
+    tune.add_argument('--compute-types', nargs='+', default=['int8', 'float32'])
+    tune.add_argument('--threads', type=int, nargs='+', default=[0], help="cpu_threads (0 = default)")
+    tune.add_argument('--beam-sizes', type=int, nargs='+', default=[1, 5])
+    tune.add_argument('--vad', nargs='+', choices=['on', 'off'], default=['on', 'off'])
+    tune.add_argument('--language', default='en')
+    tune.add_argument('--repeats', type=int, default=1)
+    tune.set_defaults(func=bench_tune)
+    
+    http = subparsers.add_parser('http', help=bench_http.__doc__)
+    http.add_argument('--requests', type=int, default=200)
+    http.set_defaults(func=bench_http)
+    
+    pool = subparsers.add_parser('pool', help=bench_pool.__doc__)
+    pool.add_argument('--requests', type=int, default=300)
+    pool.set_defaults(func=bench_pool)
+    
+    commands = subparsers.add_parser('commands', help=bench_commands.__doc__)
+    commands.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000])
+    commands.add_argument('--repeats', type=int, default=200)
+    commands.set_defaults(func=bench_commands)
+    
+    control = subparsers.add_parser('control', help=bench_control.__doc__)
+    control.add_argument('--socket', help="Control socket path (default: the daemon's)")
+    control.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    control.add_argument('--commands', type=int, default=1000, help="Commands per client")
+    control.set_defaults(func=bench_control)
+    
+    ai_stream = subparsers.add_parser('ai-stream', help=bench_ai_stream.__doc__)
+    ai_stream.add_argument('--first-token', type=float, default=0.4, help="Seconds before the first token")
+    ai_stream.add_argument('--per-token', type=float, default=0.01, help="Seconds between tokens")
+    ai_stream.add_argument('--inject-delay', type=float, default=0.02, help="Seconds each injection takes")
+    ai_stream.set_defaults(func=bench_ai_stream)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
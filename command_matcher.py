@@ -0,0 +1,125 @@
+"""Precompiled matcher for voice command patterns (post-transcription actions and AI triggers)."""
+
+import re
+
+# Characters with a meaning in a regex; a pattern without any of them is a plain phrase
+REGEX_SYNTAX = re.compile(r'[\\.^$*+?{}\[\]|()]')
+
+
+class CommandMatcher:
+    """
+    Matches a transcription against a dict of command patterns.
+    
+    Patterns keep their dict-order priority: the first pattern that matches
+    anywhere in the text wins, exactly as looping over them with re.search
+    would. Patterns are sorted into groups when the matcher is built:
+    
+    - 'phrase$' literals go into a reversed-character trie, so the end of the
+      text is walked once no matter how many phrases there are
+    - '^phrase$' literals are looked up in a dict
+    - other literal phrases are substring checks on the lowercased text
+    - everything else is precompiled (with the optional period applied) and
+      only searched while it could still beat the best match so far
+    """
+    
+    def __init__(self, patterns, opt_dot=False):
+        """
+        Args:
+            patterns (dict): Regex pattern -> value (action name or template name)
+            opt_dot (bool): Let patterns ending with $ also match before a trailing period
+        """
+        self.patterns = list(patterns.items())
+        self.opt_dot = opt_dot
+        self.suffix_trie = {}  # Reversed lowercase phrase chars -> nested dicts; '' key holds pattern indexes
+        self.exact = {}  # Lowercase phrase -> pattern index
+        self.phrases = []  # (pattern index, lowercase phrase) matched anywhere
+        self.regexes = []  # (pattern index, compiled pattern)
+        self.compiled = {}  # Pattern index -> compiled pattern, for phrases and regexes
+        
+        for index, (pattern, _) in enumerate(self.patterns):
+            if pattern.startswith('^') and pattern.endswith('$') and self._is_literal(pattern[1:-1]):
+                self.exact.setdefault(pattern[1:-1].lower(), index)
+            elif pattern.endswith('$') and self._is_literal(pattern[:-1]):
+                node = self.suffix_trie
+                for char in reversed(pattern[:-1].lower()):
+                    node = node.setdefault(char, {})
+                node.setdefault('', []).append(index)
+            elif self._is_literal(pattern):
+                self.phrases.append((index, pattern.lower()))
+                self.compiled[index] = re.compile(re.escape(pattern), re.IGNORECASE)
+            else:
+                if opt_dot and pattern.endswith('$'):
+                    pattern = pattern[:-1] + r'\.?$'
+                try:
+                    self.compiled[index] = re.compile(pattern, re.IGNORECASE)
+                    self.regexes.append((index, self.compiled[index]))
+                except re.error as e:
+                    print(f"Invalid command pattern '{pattern}' ignored: {e}")
+    
+    def __len__(self):
+        return len(self.patterns)
+    
+    @staticmethod
+    def _is_literal(text):
+        """Return True if text has no regex syntax (plain words and spaces)."""
+        return bool(text) and not REGEX_SYNTAX.search(text)
+    
+    def match(self, text):
+        """
+        Find the highest-priority pattern that matches the text.
+        
+        Args:
+            text (str): The transcription
+        
+        Returns:
+            tuple: (value, pattern, remaining_text) where remaining_text is the text
+                with the matched phrase removed and stripped, or None if nothing matched
+        """
+        best = None  # (index, start, end); no span for patterns that may occur more than once
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Lowercasing changed the length (rare Unicode); keep offsets aligned
+            lowered = text
+        
+        index = self.exact.get(lowered)
+        if index is None and self.opt_dot and lowered.endswith('.'):
+            index = self.exact.get(lowered[:-1])
+        if index is not None:
+            best = (index, 0, len(text))
+        
+        ends = [len(text)]
+        if self.opt_dot and lowered.endswith('.'):
+            ends.append(len(text) - 1)
+        for end in ends:
+            node = self.suffix_trie
+            position = end
+            while node:
+                if '' in node and (best is None or node[''][0] < best[0]):
+                    best = (node[''][0], position, len(text))
+                if position == 0:
+                    break
+                position -= 1
+                node = node.get(lowered[position])
+        
+        for index, phrase in self.phrases:
+            if best is not None and index > best[0]:
+                break
+            if phrase in lowered:
+                best = (index, None, None)
+                break
+        
+        for index, compiled in self.regexes:
+            if best is not None and index > best[0]:
+                break
+            if compiled.search(text):
+                best = (index, None, None)
+                break
+        
+        if best is None:
+            return None
+        index, start, end = best
+        pattern, value = self.patterns[index]
+        if start is None:
+            # Like re.sub, remove every occurrence of an unanchored pattern
+            return value, pattern, self.compiled[index].sub('', text).strip()
+        return value, pattern, (text[:start] + text[end:]).strip()
@@ -6,20 +6,123 @@ username = os.getenv('USER')
 
 # Whisper API settings
 WHISPER_API_URL = "http://localhost:4444/v1/audio/transcriptions"
+HTTP_POOL_SIZE = 4  # Keep-alive connections kept open to the Whisper API
+
+# Request timeouts and retries
+# The read timeout is scaled to the clip: TIMEOUT_FACTOR x the predicted
+# latency (REQUEST_OVERHEAD + real-time factor x audio seconds), where the
+# real-time factor is learned from past requests starting at INITIAL_RTF
+REQUEST_OVERHEAD = 0.5  # Fixed per-request latency (seconds)
+INITIAL_RTF = 0.5  # Server seconds per audio second before any measurement
+TIMEOUT_FACTOR = 3.0
+MIN_READ_TIMEOUT = 5  # Seconds
+MAX_RETRIES = 1  # Extra attempts after every server failed
+RETRY_BACKOFF = 0.5  # Seconds before the first retry, doubled for each next one
+
+# Whisper API server pool
+# Add more transcription URLs to load balance across several Whisper
+# containers; failed servers are skipped and requests fail over to the next
+WHISPER_API_URLS = [WHISPER_API_URL]
+LOAD_BALANCING = 'least_outstanding'  # Options: 'least_outstanding', 'latency'
+CONNECT_TIMEOUT = 3  # Seconds before an unreachable server is given up on
+CIRCUIT_BREAKER_FAILURES = 3  # Consecutive failures before a server is skipped
+CIRCUIT_BREAKER_COOLDOWN = 30  # Seconds a failed server is skipped for
+
+# Background health monitor (probes each server's /v1/health endpoint)
+# While every server is down, transcriptions fail immediately instead of
+# waiting for a timeout
+HEALTH_CHECK_INTERVAL = 10  # Seconds between probes of healthy servers
+HEALTH_RECHECK_INTERVAL = 1  # Seconds between probes of servers that are down
+
+# Hedged requests: if a server has not answered within its p95 latency for a
+# clip of that length (HEDGE_DELAY or the predicted latency, whichever is
+# longer, until enough samples exist), send the same audio to a second server
+# and use whichever answers first
+HEDGE_REQUESTS = False
+HEDGE_DELAY = 2.0  # Seconds
+
+# Decoding
+# Beam size requested from the server (None = server default, 1 = greedy).
+# Clips up to GREEDY_MAX_DURATION seconds, typically short commands, are
+# always decoded greedily for lower latency; 0 disables that
+BEAM_SIZE = None
+GREEDY_MAX_DURATION = 3.0  # Seconds
+
+# Transcription cache
+# Identical audio (retries, replays, duplicate uploads) is answered from an
+# LRU cache instead of a Whisper round trip. Entries are keyed on the audio,
+# the decoding parameters and the API URLs, but not on the server's model, so
+# clear the cache (or leave it off) when the server changes models
+ENABLE_TRANSCRIPTION_CACHE = False
+TRANSCRIPTION_CACHE_SIZE = 256  # Maximum cached transcriptions
+TRANSCRIPTION_CACHE_TTL = 24 * 3600  # Seconds before an entry expires
+TRANSCRIPTION_CACHE_DIR = None  # Set to a directory to also keep entries on disk
 
 # Audio recording settings
 SAMPLE_RATE = 16000  # Sample rate in Hz (Whisper works best with 16kHz)
 CHANNELS = 1  # Mono audio
 AUDIO_FORMAT = 'wav'  # Audio file format
 
+# If True, the microphone is opened at its native sample rate (e.g. 44.1k or
+# 48k) and resampled to SAMPLE_RATE in Python, instead of asking PortAudio/ALSA
+# to convert (slow or unsupported on some devices)
+CAPTURE_NATIVE_RATE = False
+
+# Encoding used when uploading recordings to the Whisper API
+# Options: 'wav_int16' (default), 'wav_float32', 'flac', 'opus', 'pcm_int16', 'pcm_float32'
+# 'flac' and 'opus' require the soundfile library (pip install soundfile);
+# without it recordings fall back to 'wav_int16'
+# 'pcm_int16' and 'pcm_float32' upload raw 16 kHz mono samples, which the bundled
+# server decodes in memory instead of going through a temp file and ffmpeg
+UPLOAD_ENCODING = 'wav_int16'
+
 # Recording behavior
 MAX_RECORDING_DURATION = 240  # Maximum recording duration in seconds
 SILENCE_THRESHOLD = 0.01  # Silence detection threshold (0.0 to 1.0)
 SILENCE_DURATION = 2.0  # Duration of silence to stop recording (seconds)
 
+# Adaptive endpointing
+# If True, the silence threshold follows the room's noise floor (instead of
+# SILENCE_THRESHOLD) and recordings stop after MIN_SILENCE_DURATION once an
+# utterance has clearly ended, falling back to SILENCE_DURATION otherwise
+ADAPTIVE_ENDPOINTING = False
+MIN_SILENCE_DURATION = 0.8  # Shortest hangover after a clear utterance end (seconds)
+
+# Silence trimming
+# If True, leading/trailing silence is cut before upload and recordings
+# without any speech are not sent to the Whisper API at all
+TRIM_SILENCE = True
+TRIM_PADDING = 0.25  # Audio kept before and after the detected speech (seconds)
+
+# Streaming transcription
+# If True, long dictations are cut at natural pauses while recording and each
+# segment is transcribed in the background, so only the last segment is
+# outstanding when the recording stops
+STREAMING_TRANSCRIPTION = False
+STREAMING_MIN_SEGMENT = 8.0  # Minimum segment length before cutting (seconds)
+STREAMING_PAUSE_DURATION = 0.4  # Pause length that allows a cut (seconds)
+
+# Warm input stream
+# If True, the daemon keeps the microphone stream open so recordings start
+# instantly and include PREROLL_DURATION seconds of audio from before the trigger
+KEEP_STREAM_WARM = False
+PREROLL_DURATION = 0.4  # Pre-roll kept by the warm stream (seconds)
+
 # Temp file settings
+# Recordings are passed to the API client in memory; set SAVE_AUDIO_FILE to
+# True to also write each recording to TEMP_AUDIO_FILE for debugging
+SAVE_AUDIO_FILE = False
 TEMP_AUDIO_FILE = f"/tmp/{username}_whisper_recording.wav"
 
+# Disk spool for long recordings
+# If True, the recording buffer is a memory-mapped file of preallocated size,
+# so resident memory stays constant no matter how long MAX_RECORDING_DURATION is.
+# Each process gets its own unnamed file in SPOOL_DIR (removed when it exits).
+# SPOOL_DIR must be on disk-backed storage: on tmpfs (/tmp on many distros)
+# the mapped file lives in RAM and memory is not bounded
+SPOOL_TO_DISK = False
+SPOOL_DIR = os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'anywhisper')
+
 # Notification settings
 ENABLE_NOTIFICATIONS = True  # Show desktop notifications (requires notify-send)
 
@@ -28,6 +131,23 @@ ENABLE_NOTIFICATIONS = True  # Show desktop notifications (requires notify-send)
 # If False, types character by character (more compatible)
 USE_COPY_PASTE_METHOD = True
 
+# Streaming text injection
+# If True, the Whisper server streams segments as they are decoded and each
+# sentence is typed while later ones are still being transcribed. The last
+# segment is held back so post-transcription actions still work; AI triggers
+# only apply to text that has not been typed yet when the trigger is heard.
+# Until the first segment arrives, a streamed request is retried and fails
+# over like a normal one; a stream that breaks off after that is not re-sent
+# (its text may already be typed), and the rest of that recording is lost
+STREAM_TEXT_INJECTION = False
+
+# Background processing
+# Finished recordings are transcribed, processed and injected in the background,
+# so a new recording can start while earlier ones are still in flight. Text is
+# always injected in recording order
+TRANSCRIBE_WORKERS = 2  # Recordings transcribed (and AI-processed) at the same time
+PIPELINE_QUEUE_SIZE = 4  # Recordings waiting per stage before new recordings are refused
+
 # Logging settings
 LOG_FILE = f"/tmp/{username}_anywhisper.log"  # Log file location
 LOG_LEVEL = "INFO"  # Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -92,6 +212,12 @@ AI_PROVIDER = 'gemini'  # Options: gemini, openai, anthropic, groq, etc.
 # OpenAI: 'gpt-4o', 'gpt-4o-mini'
 # Anthropic: 'claude-sonnet-4-20250514', 'claude-3-5-sonnet-20241022'
 AI_MODEL_NAME = 'gemini-2.5-flash-lite'
+AI_TIMEOUT = 60  # Seconds to wait for the AI provider
+
+# Type AI output while the model is still generating it, a sentence or line at
+# a time, instead of waiting for the whole completion (useful for long outputs
+# like VIBE_EXTEND_TEMPLATE)
+STREAM_AI_OUTPUT = False
 
 # Post-AI Processing Triggers
 # Regex patterns that trigger AI processing
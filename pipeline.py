@@ -0,0 +1,117 @@
+"""Ordered multi-stage pipeline for processing recordings in the background."""
+
+import queue
+import threading
+
+
+class Pipeline:
+    """
+    Runs items through a chain of stages, each with its own worker threads
+    behind a bounded queue.
+    
+    Every item gets a sequence number when it is submitted. Earlier stages
+    may finish items out of order, but the last stage runs on a single
+    thread and always sees them in sequence order.
+    """
+    
+    def __init__(self, stages, queue_size=4):
+        """
+        Args:
+            stages (list): (name, func, workers) tuples. func(seq, item) returns
+                the item handed to the next stage; the last stage's workers
+                count is ignored (it always runs on one thread)
+            queue_size (int): Items each stage's queue holds before submit() blocks
+        """
+        self.names = [name for name, _, _ in stages]
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.active = [0] * len(stages)  # Items being worked on, per stage
+        self.lock = threading.Lock()
+        self.submit_lock = threading.Lock()  # Keeps sequence numbers in queue order
+        self.next_seq = 0
+        self.reorder = {}  # Items that reached the last stage ahead of their turn
+        self.done_seq = -1  # Highest sequence number the last stage has finished
+        self.turn = threading.Condition()
+        
+        for index, (name, func, workers) in enumerate(stages):
+            last = index == len(stages) - 1
+            for worker in range(1 if last else workers):
+                target = self._run_last_stage if last else self._run_stage
+                threading.Thread(target=target, args=(index, func), daemon=True,
+                                 name=f"{name}-{worker}").start()
+    
+    def submit(self, item):
+        """
+        Queue an item at the first stage, blocking while that queue is full.
+        
+        Returns:
+            int: The item's sequence number
+        """
+        with self.submit_lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            self.queues[0].put((seq, item))
+        return seq
+    
+    def full(self):
+        """Return True if the first stage cannot take another item right now."""
+        return self.queues[0].full()
+    
+    def wait_turn(self, seq):
+        """Block until every item submitted before seq has left the last stage."""
+        with self.turn:
+            self.turn.wait_for(lambda: self.done_seq >= seq - 1)
+    
+    def depths(self):
+        """
+        Returns:
+            dict: Items queued or being worked on, per stage name
+        """
+        depths = {}
+        with self.lock:
+            for index, name in enumerate(self.names):
+                depths[name] = self.queues[index].qsize() + self.active[index]
+        with self.turn:
+            depths[self.names[-1]] += len(self.reorder)
+        return depths
+    
+    def _call(self, index, func, seq, item):
+        """Run one stage function, counting it as active while it runs."""
+        with self.lock:
+            self.active[index] += 1
+        try:
+            return func(seq, item)
+        finally:
+            with self.lock:
+                self.active[index] -= 1
+    
+    def _run_stage(self, index, func):
+        """Worker loop for every stage but the last."""
+        while True:
+            seq, item = self.queues[index].get()
+            try:
+                item = self._call(index, func, seq, item)
+            except Exception as e:
+                print(f"Pipeline stage '{self.names[index]}' failed for item {seq}: {e}")
+                item = None
+            # Always pass the item on, so the last stage never waits on a lost sequence number
+            self.queues[index + 1].put((seq, item))
+    
+    def _run_last_stage(self, index, func):
+        """Worker loop for the last stage: runs items strictly in sequence order."""
+        while True:
+            seq, item = self.queues[index].get()
+            with self.turn:
+                self.reorder[seq] = item
+            while True:
+                with self.turn:
+                    if self.done_seq + 1 not in self.reorder:
+                        break
+                    seq = self.done_seq + 1
+                    item = self.reorder.pop(seq)
+                try:
+                    self._call(index, func, seq, item)
+                except Exception as e:
+                    print(f"Pipeline stage '{self.names[index]}' failed for item {seq}: {e}")
+                with self.turn:
+                    self.done_seq = seq
+                    self.turn.notify_all()
@@ -0,0 +1,115 @@
+"""Warm-stream recording tests, fed through a fake input stream (no microphone needed)."""
+
+import io
+from functools import partial
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sounddevice')
+from scipy.io import wavfile
+
+import audio_recorder
+
+BLOCKSIZE = 1024
+
+
+class FakeInputStream:
+    """Stand-in for sd.InputStream; the tests feed audio through the callback themselves."""
+    
+    def start(self):
+        pass
+    
+    def stop(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class BlockFeeder:
+    """Pushes loud blocks through the recorder callback, each filled with a level that identifies it."""
+    
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.block_id = 0
+    
+    def feed(self, blocks):
+        ids = []
+        for _ in range(blocks):
+            self.block_id += 1
+            block = np.full((BLOCKSIZE, self.recorder.channels), self.level(self.block_id), dtype='float32')
+            self.recorder._callback(block, BLOCKSIZE, None, None)
+            ids.append(self.block_id)
+        return ids
+    
+    @staticmethod
+    def level(block_id):
+        # Cycle through the levels so any number of blocks stays well above the silence threshold
+        return 0.05 + (block_id % 500) * 1e-3
+    
+    @staticmethod
+    def ids(audio_data):
+        """Return the block levels found in an exported wav_float32 recording."""
+        _, audio = wavfile.read(io.BytesIO(audio_data))
+        return set(np.round((audio.reshape(len(audio), -1)[:, 0] - 0.05) / 1e-3).astype(int).tolist())
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    # Export float32 WAV so every block level survives encoding exactly
+    monkeypatch.setattr(audio_recorder, 'encode_audio',
+                        partial(audio_recorder.encode_audio, encoding='wav_float32'))
+    recorder = audio_recorder.AudioRecorder()
+    recorder._create_stream = FakeInputStream
+    assert recorder.open_stream()
+    yield recorder
+    # A failed test may leave its recording thread waiting
+    if recorder.is_recording:
+        recorder.stop_recording()
+    recorder.close_stream()
+
+
+def record(recorder, feeder, blocks):
+    recorder.start_recording()
+    ids = feeder.feed(blocks)
+    return ids, recorder.stop_recording()
+
+
+def test_warm_recording_includes_preroll(recorder):
+    feeder = BlockFeeder(recorder)
+    before = feeder.feed(20)
+    ids, audio_data = record(recorder, feeder, 30)
+    
+    got = BlockFeeder.ids(audio_data)
+    preroll_blocks = recorder.preroll_frames // BLOCKSIZE
+    assert set(ids) <= got
+    assert set(before[-preroll_blocks:]) <= got
+    assert not got & set(before[:-preroll_blocks - 1])
+
+
+def test_warm_recordings_are_isolated(recorder):
+    feeder = BlockFeeder(recorder)
+    feeder.feed(20)
+    first_ids, _ = record(recorder, feeder, 30)
+    before = feeder.feed(20)
+    second_ids, audio_data = record(recorder, feeder, 30)
+    
+    got = BlockFeeder.ids(audio_data)
+    assert set(second_ids) <= got
+    assert set(before[-(recorder.preroll_frames // BLOCKSIZE):]) <= got
+    assert not got & set(first_ids)
+
+
+def test_recording_after_buffer_wrapped_is_a_view(recorder):
+    feeder = BlockFeeder(recorder)
+    # Idle until the warm buffer wraps, so the pre-roll straddles the end of the storage
+    while recorder.buffer.write_pos < recorder.buffer.capacity:
+        feeder.feed(1)
+    assert recorder.buffer.write_pos % recorder.buffer.capacity < recorder.preroll_frames
+    
+    recorder.start_recording()
+    ids = feeder.feed(30)
+    audio = recorder.buffer.slice(recorder.start_pos)
+    assert audio.base is not None
+    assert len(audio) == recorder.preroll_frames + len(ids) * BLOCKSIZE
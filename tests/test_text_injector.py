@@ -0,0 +1,66 @@
+"""Streamed text injection tests, with a scripted token stream and an injector that records instead of typing."""
+
+from text_injector import TextInjector, text_batches
+
+AI_OUTPUT = """Here is the extended plan for the settings page.
+
+1. Add a form with the display name, email and avatar fields. Validate the email on blur and show inline errors.
+2. Save changes through the existing profile endpoint. Disable the button while the request is in flight.
+3. Add a danger zone section for deleting the account, behind a confirmation dialog.
+
+Once this works, add tests for the validation rules and the failure states of the save request."""
+
+
+def token_stream(text, token_chars=4):
+    """Emit text in small fragments, as an LLM would."""
+    for i in range(0, len(text), token_chars):
+        yield text[i:i + token_chars]
+
+
+class RecordingInjector(TextInjector):
+    """Records each injection instead of typing; fails from the fail_at-th injection on."""
+    
+    def __init__(self, fail_at=None):
+        self.method = 'x11'
+        self.fail_at = fail_at
+        self.injections = []
+        self.actions = []
+    
+    def inject_text(self, text, post_action=None):
+        self.injections.append(text)
+        return self.fail_at is None or len(self.injections) < self.fail_at
+    
+    def _execute_key_action(self, action):
+        self.actions.append(action)
+
+
+def test_text_batches_join_back_to_stripped_text():
+    batches = list(text_batches(token_stream('\n  ' + AI_OUTPUT + '  \n')))
+    assert ''.join(batches) == AI_OUTPUT.strip()
+    assert all(batch.strip() for batch in batches)
+
+
+def test_text_batches_cut_at_sentences_and_lines():
+    batches = list(text_batches(token_stream(AI_OUTPUT)))
+    assert batches[0] == 'Here is the extended plan for the settings page.'
+    # "1." is too short to be a batch on its own; the list item is cut at its sentence end
+    assert batches[1] == '\n\n1. Add a form with the display name, email and avatar fields.'
+    assert len(batches) == 7
+
+
+def test_inject_stream_injects_each_batch():
+    injector = RecordingInjector()
+    success, text = injector.inject_stream(token_stream(AI_OUTPUT), post_action='ENTER')
+    assert success
+    assert text == AI_OUTPUT.strip()
+    assert injector.injections == list(text_batches(token_stream(AI_OUTPUT)))
+    assert injector.actions == ['ENTER']
+
+
+def test_inject_stream_reads_the_rest_after_a_failed_injection():
+    injector = RecordingInjector(fail_at=2)
+    success, text = injector.inject_stream(token_stream(AI_OUTPUT), post_action='ENTER')
+    assert not success
+    assert text == AI_OUTPUT.strip()
+    assert len(injector.injections) == 2
+    assert injector.actions == []
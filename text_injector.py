@@ -6,6 +6,46 @@ import os
 import re
 from config import USE_COPY_PASTE_METHOD
 
+# Where a streamed batch may end: after sentence-ending punctuation, or before a line break
+BATCH_BOUNDARY = re.compile(r'[.!?]["\')\]]*(?=\s)|(?=\n)')
+
+
+def text_batches(chunks, min_length=20):
+    """
+    Regroup streamed text fragments (e.g. LLM tokens) into sentence- or line-sized batches.
+    
+    The whitespace after a boundary is carried into the next batch, so the
+    batches join back into the stream's text with leading and trailing
+    whitespace stripped.
+    
+    Args:
+        chunks (iterable): Text fragments, in order
+        min_length (int): Shortest batch to cut at a sentence end ("1. " in a
+            list is not worth its own injection); line breaks always cut
+    
+    Yields:
+        str: Batches of text
+    """
+    buffer = ''
+    started = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        if not started:
+            buffer = buffer.lstrip()
+            started = bool(buffer)
+        start = 0
+        for boundary in BATCH_BOUNDARY.finditer(buffer):
+            end = boundary.end()
+            if buffer[start:end].strip() and (end - start >= min_length or buffer[end:end + 1] == '\n'):
+                yield buffer[start:end]
+                start = end
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.rstrip()
+
+
 class TextInjector:
     """Injects text into the currently focused application."""
     
@@ -70,6 +110,31 @@ class TextInjector:
             print(f"Error injecting text: {e}")
             return False
     
+    def inject_stream(self, chunks, post_action=None):
+        """
+        Inject streamed text a sentence or line at a time, as it arrives.
+        
+        Args:
+            chunks (iterable): Text fragments, in order (e.g. LLM tokens)
+            post_action (str): Optional key action to perform after the last batch
+            
+        Returns:
+            tuple: (success, text) where text is everything the stream produced;
+                after a failed injection the rest of the stream is still read
+                but not injected
+        """
+        success = True
+        batches = []
+        for batch in text_batches(chunks):
+            batches.append(batch)
+            if success:
+                success = self.inject_text(batch)
+        
+        if success and batches and post_action:
+            time.sleep(0.1)  # Small delay before key action
+            self._execute_key_action(post_action)
+        return success, ''.join(batches)
+    
     def _inject_via_clipboard(self, text):
         """
         Inject text via clipboard + Shift+Insert paste.
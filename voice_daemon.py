@@ -6,14 +6,19 @@ Background service that listens for recording triggers via a Unix socket.
 """
 
 import os
+import asyncio
 import socket
 import threading
 import signal
 import sys
-import re
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
 from audio_recorder import AudioRecorder
 from api_client import WhisperAPIClient
+from pipeline import Pipeline
+from command_matcher import CommandMatcher
 import config
 from text_injector import TextInjector
 from config import (
@@ -25,13 +30,24 @@ from config import (
     AI_MODEL_NAME,
     AI_PROVIDER,
     AI_PROMPT_TEMPLATES,
+    AI_TIMEOUT,
     POST_AI_TRIGGERS,
+    KEEP_STREAM_WARM,
+    STREAMING_TRANSCRIPTION,
+    STREAM_TEXT_INJECTION,
+    STREAM_AI_OUTPUT,
+    PIPELINE_QUEUE_SIZE,
+    TRANSCRIBE_WORKERS,
     LOG_FILE,
     LOG_LEVEL
 )
 
 
 SOCKET_PATH = "/tmp/voice_to_text.sock"
+CONTROL_COMMANDS = ("START", "STOP", "TOGGLE", "STATUS", "PING", "QUEUES")
+CONTROL_WORKERS = 2  # Threads for commands that block (START/STOP/TOGGLE)
+MAX_PENDING_COMMANDS = 8  # Blocking commands queued before answering BUSY
+MAX_COMMAND_LENGTH = 1024  # Bytes without a newline before a connection is dropped
 
 # Setup logging
 logging.basicConfig(
@@ -53,10 +69,45 @@ class VoiceDaemon:
         self.api_client = WhisperAPIClient()
         self.text_injector = TextInjector()
         self.is_recording = False
+        self.recording_id = 0  # Incremented per recording, so a monitor only stops its own
+        self.state_lock = threading.Lock()
         self.socket = None
         self.running = True
         self.ydotoold_process = None
         
+        # Streaming transcription: segments cut during recording are
+        # transcribed in the background and stitched in order at stop time
+        self.segment_futures = []
+        self.segment_exports = []
+        self.segment_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='segment')
+        self.encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encode')
+        
+        # Finished recordings go through transcribe -> process (actions/AI) -> inject
+        # in the background, so the next recording can start right away; text is
+        # always injected in the order the recordings were made
+        self.recorder_lock = threading.Lock()
+        self.pipeline = Pipeline([
+            ("transcribe", self._transcribe_stage, TRANSCRIBE_WORKERS),
+            ("process", self._process_stage, TRANSCRIBE_WORKERS),
+            ("inject", self._inject_stage, 1),
+        ], queue_size=PIPELINE_QUEUE_SIZE)
+        
+        # Control connections are multiplexed on one event loop; commands
+        # that block are handed to a small executor
+        self.command_executor = ThreadPoolExecutor(max_workers=CONTROL_WORKERS, thread_name_prefix='command')
+        self.pending_commands = 0
+        self.stop_serving = None
+        self.connections = {}  # Open control connections: writer -> handler task
+        # AI client (litellm), warmed up in the background by start()
+        self.ai_completion = None
+        self.ai_model = f"{AI_PROVIDER}/{AI_MODEL_NAME}"
+        self.ai_calls = 0
+        self.ai_ready = threading.Event()
+        
+        # Voice command patterns are compiled once, not per transcription
+        self.action_matcher = CommandMatcher(POST_TRANSCRIPTION_ACTIONS, POST_TRANSCRIPTION_OPT_DOT)
+        self.ai_matcher = CommandMatcher(POST_AI_TRIGGERS, POST_TRANSCRIPTION_OPT_DOT)
+        
         # Setup signal handlers
         signal.signal(signal.SIGINT, self.shutdown)
         signal.signal(signal.SIGTERM, self.shutdown)
@@ -67,6 +118,7 @@ class VoiceDaemon:
         logger.info(f"Log level: {LOG_LEVEL}")
         logger.info(f"AI Processing: {'ENABLED' if ENABLE_AI_PROCESSING else 'DISABLED'}")
         logger.info(f"Transcription Actions: {'ENABLED' if ENABLE_TRANSCRIPTION_ACTIONS else 'DISABLED'}")
+        logger.info(f"Streaming Transcription: {'ENABLED' if STREAMING_TRANSCRIPTION else 'DISABLED'}")
         logger.info("=" * 60)
     
     def notify(self, title, message):
@@ -78,16 +130,36 @@ class VoiceDaemon:
     
     def start_recording(self):
         """Start voice recording."""
-        if self.is_recording:
-            logger.warning("Recording start requested but already recording")
-            return "ALREADY_RECORDING"
+        with self.state_lock:
+            if self.is_recording:
+                logger.warning("Recording start requested but already recording")
+                return "ALREADY_RECORDING"
+            
+            if self.pipeline.full():
+                logger.warning(f"Recording start refused, pipeline is full: {self.pipeline.depths()}")
+                print("⏳ Still processing earlier recordings, try again shortly")
+                self.notify("AnyWhisper", "⏳ Still processing earlier recordings")
+                return "BUSY"
+            
+            self.is_recording = True
+            self.recording_id += 1
+            recording_id = self.recording_id
+            # Fresh lists: a stop still finishing has claimed the previous ones
+            segment_futures = self.segment_futures = []
+            segment_exports = self.segment_exports = []
         
         logger.info("Recording started")
-        self.is_recording = True
         print("🎤 Recording started...")
         # self.notify("AnyWhisper", "🎤 Recording... Speak now!")
         
-        success = self.recorder.start_recording()
+        # Pre-connect to the Whisper API while the user is speaking
+        self.api_client.warm_up()
+        
+        # Waits for a previous stop to finish with the recorder and its buffer
+        with self.recorder_lock:
+            if STREAMING_TRANSCRIPTION:
+                self.recorder.on_segment = partial(self._submit_segment, segment_futures, segment_exports)
+            success = self.recorder.start_recording()
         if not success:
             logger.error("Failed to start audio recorder")
             self.is_recording = False
@@ -97,37 +169,72 @@ class VoiceDaemon:
         
         logger.debug("Audio recorder started successfully")
         # Start monitoring thread to detect when recording stops automatically
-        threading.Thread(target=self._monitor_recording, daemon=True).start()
+        threading.Thread(target=self._monitor_recording, args=(recording_id,), daemon=True).start()
         logger.debug("Recording monitor thread started")
         
         return "RECORDING"
     
-    def stop_recording(self):
-        """Stop recording and process audio."""
-        if not self.is_recording:
-            logger.warning("Stop recording requested but not currently recording")
-            return "NOT_RECORDING"
+    def stop_recording(self, recording_id=None):
+        """
+        Stop recording and process audio.
+        
+        Args:
+            recording_id (int): Only stop if this recording is still the current one
+        """
+        with self.state_lock:
+            if not self.is_recording or recording_id not in (None, self.recording_id):
+                logger.warning("Stop recording requested but not currently recording")
+                return "NOT_RECORDING"
+            # Claim the stop so the recording monitor does not process it twice,
+            # along with this recording's segments; the recorder is locked before
+            # a new start can reach it
+            self.is_recording = False
+            segment_futures = self.segment_futures
+            segment_exports = self.segment_exports
+            self.recorder_lock.acquire()
         
         logger.info("Stopping recording...")
         print("⏹️  Stopping recording...")
         # self.notify("AnyWhisper", "⏹️ Processing...")
         
-        # Stop recording and get the audio file
-        audio_file = self.recorder.stop_recording()
-        self.is_recording = False
-        
-        if not audio_file:
+        # Stop recording and get the in-memory audio; segments cut earlier are
+        # encoded before the buffer can be reused by the next recording
+        try:
+            audio_data = self.recorder.stop_recording()
+            wait(segment_exports)
+        finally:
+            self.recorder_lock.release()
+        
+        if segment_futures:
+            # Earlier segments are already being transcribed; only the tail
+            # (if it has any speech) is still outstanding
+            logger.info(f"Audio captured: {len(segment_futures)} segment(s) in flight, "
+                        f"final segment {self.recorder.sent_duration:.2f}s")
+            self._enqueue(audio_data, segment_futures)
+            return "PROCESSING"
+        
+        if not audio_data and self.recorder.recorded_duration > 0:
+            logger.info(f"No speech detected in {self.recorder.recorded_duration:.2f}s of audio, skipping transcription")
+            print("🔇 No speech detected")
+            return "NO_SPEECH"
+        
+        if not audio_data:
             logger.warning("No audio recorded - recorder returned None")
             print("❌ No audio recorded")
             self.notify("AnyWhisper", "❌ No audio recorded")
             return "NO_AUDIO"
         
-        logger.info(f"Audio file saved: {audio_file}")
-        # Transcribe in a separate thread to not block
-        threading.Thread(target=self._process_audio, args=(audio_file,), daemon=True).start()
-        logger.debug("Audio processing thread started")
+        trimmed = self.recorder.recorded_duration - self.recorder.sent_duration
+        logger.info(f"Audio captured: {len(audio_data)} bytes, {self.recorder.sent_duration:.2f}s sent "
+                    f"({trimmed:.2f}s of silence trimmed)")
+        self._enqueue(audio_data)
         return "PROCESSING"
     
+    def _enqueue(self, audio_data, segment_futures=None):
+        """Hand a finished recording to the processing pipeline."""
+        seq = self.pipeline.submit((audio_data, segment_futures))
+        logger.debug(f"Recording {seq} queued for processing, pipeline: {self.pipeline.depths()}")
+    
     def toggle_recording(self):
         """Toggle recording on/off."""
         if self.is_recording:
@@ -135,67 +242,90 @@ class VoiceDaemon:
         else:
             return self.start_recording()
     
-    def _process_with_ai(self, text, template_name):
+    def _prepare_ai(self, text, template_name):
         """
-        Process text with AI using the specified template.
+        Check that AI processing can run and build the messages for a template.
         
         Args:
             text (str): The text to process
             template_name (str): Name of the template from AI_PROMPT_TEMPLATES
             
         Returns:
-            str: AI-processed text, or original text if processing fails
+            list: Chat messages for the completion call, or None if AI processing cannot run
         """
         logger.info(f"AI processing started: template={template_name}, input_length={len(text)}")
         
         if not ENABLE_AI_PROCESSING:
             logger.debug("AI Processing is disabled")
-            return text
+            return None
         
         if not AI_API_KEY:
             logger.warning("AI_API_KEY not configured")
             print("⚠️  AI_API_KEY not configured, skipping AI processing")
-            return text
+            return None
         
         template = AI_PROMPT_TEMPLATES.get(template_name)
         if not template:
             logger.error(f"AI template '{template_name}' not found in AI_PROMPT_TEMPLATES")
             print(f"⚠️  Template '{template_name}' not found")
-            return text
+            return None
         
-        try:
-            from litellm import completion
-        except ImportError:
+        # The client is imported and configured in the background at startup
+        if not self.ai_ready.is_set():
+            logger.info("Waiting for AI client warm-up to finish...")
+        self.ai_ready.wait()
+        if self.ai_completion is None:
             logger.error("litellm library not installed")
             print("⚠️  litellm library not installed. Install with: pip install litellm")
+            return None
+        
+        logger.debug(f"Calling AI API: model={self.ai_model}, provider={AI_PROVIDER}")
+        print(f"🤖 Processing with AI ({self.ai_model})...")
+        
+        # Replace placeholder with actual user input
+        messages = []
+        for msg in template:
+            message = {
+                "role": msg["role"],
+                "content": msg["content"].replace("__USER_INPUT__", text)
+            }
+            messages.append(message)
+        
+        logger.debug(f"AI messages prepared: {len(messages)} messages")
+        return messages
+    
+    def _log_ai_latency(self, latency, detail=""):
+        """Log how long an AI call took, calling out the first one since startup."""
+        self.ai_calls += 1
+        if self.ai_calls == 1:
+            logger.info(f"First AI call latency{detail}: {latency:.2f}s")
+        else:
+            logger.info(f"AI call latency{detail}: {latency:.2f}s")
+    
+    def _process_with_ai(self, text, template_name):
+        """
+        Process text with AI using the specified template.
+        
+        Args:
+            text (str): The text to process
+            template_name (str): Name of the template from AI_PROMPT_TEMPLATES
+            
+        Returns:
+            str: AI-processed text, or original text if processing fails
+        """
+        messages = self._prepare_ai(text, template_name)
+        if messages is None:
             return text
         
         try:
-            # Set API key as environment variable for litellm
-            env_var_name = f"{AI_PROVIDER.upper()}_API_KEY"
-            os.environ[env_var_name] = AI_API_KEY
-            
-            # Construct model name with provider prefix
-            full_model_name = f"{AI_PROVIDER}/{AI_MODEL_NAME}"
-            logger.debug(f"Calling AI API: model={full_model_name}, provider={AI_PROVIDER}")
-            print(f"🤖 Processing with AI ({full_model_name})...")
-            
-            # Replace placeholder with actual user input
-            messages = []
-            for msg in template:
-                message = {
-                    "role": msg["role"],
-                    "content": msg["content"].replace("__USER_INPUT__", text)
-                }
-                messages.append(message)
-            
-            logger.debug(f"AI messages prepared: {len(messages)} messages")
-            
             # Call LiteLLM completion API
-            response = completion(
-                model=full_model_name,
-                messages=messages
+            call_start = time.monotonic()
+            response = self.ai_completion(
+                model=self.ai_model,
+                messages=messages,
+                timeout=AI_TIMEOUT
             )
+            self._log_ai_latency(time.monotonic() - call_start)
             
             ai_output = response.choices[0].message.content.strip()
             logger.info(f"AI processing successful: output_length={len(ai_output)}")
@@ -208,34 +338,196 @@ class VoiceDaemon:
             print(f"⚠️  AI processing failed: {e}")
             return text
     
-    def _monitor_recording(self):
-        """Monitor the recording and auto-process when it stops."""
-        import time
+    def _stream_with_ai(self, text, template_name):
+        """
+        Process text with AI, yielding the output as the model generates it.
         
-        logger.debug("Recording monitor: watching for automatic stop")
+        Args:
+            text (str): The text to process
+            template_name (str): Name of the template from AI_PROMPT_TEMPLATES
+            
+        Yields:
+            str: Fragments of the AI output, or the original text if processing
+                fails before any output arrived
+        """
+        messages = self._prepare_ai(text, template_name)
+        if messages is None:
+            yield text
+            return
         
-        # Wait while recording is active
-        while self.is_recording and self.recorder.is_recording:
-            time.sleep(0.2)
+        call_start = time.monotonic()
+        length = 0
+        try:
+            response = self.ai_completion(
+                model=self.ai_model,
+                messages=messages,
+                timeout=AI_TIMEOUT,
+                stream=True
+            )
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                fragment = chunk.choices[0].delta.content
+                if not fragment:
+                    continue
+                if not length:
+                    self._log_ai_latency(time.monotonic() - call_start, detail=" to first token")
+                length += len(fragment)
+                yield fragment
+            logger.info(f"AI streaming finished: output_length={length}, "
+                        f"total {time.monotonic() - call_start:.2f}s")
+        except Exception as e:
+            logger.error(f"AI processing failed: {type(e).__name__}: {e}", exc_info=True)
+            print(f"⚠️  AI processing failed: {e}")
+            if not length:
+                yield text
+    
+    def _warm_up_ai(self):
+        """
+        Import litellm and resolve the provider config.
         
-        # Give a small delay to ensure recording thread fully completes
-        time.sleep(0.3)
+        Runs in the background at startup so the first AI-triggered dictation
+        does not pay for litellm's multi-second import. Connections are left to
+        litellm: each provider handler manages its own HTTP client.
+        """
+        start = time.monotonic()
+        try:
+            try:
+                import litellm
+            except ImportError:
+                logger.warning("litellm library not installed, AI processing unavailable")
+                return
+            import_time = time.monotonic() - start
+            
+            # Resolve the provider config once instead of on every call; this
+            # also surfaces an unknown provider or model name at startup
+            os.environ[f"{AI_PROVIDER.upper()}_API_KEY"] = AI_API_KEY
+            self.ai_model = f"{AI_PROVIDER}/{AI_MODEL_NAME}"
+            try:
+                litellm.get_llm_provider(self.ai_model)
+            except Exception as e:
+                logger.warning(f"AI provider config for {self.ai_model} did not resolve: {e}")
+            
+            self.ai_completion = litellm.completion
+            logger.info(f"AI client ready in {time.monotonic() - start:.2f}s "
+                        f"(import {import_time:.2f}s, model {self.ai_model})")
+        except Exception as e:
+            logger.error(f"AI client warm-up failed: {type(e).__name__}: {e}", exc_info=True)
+        finally:
+            self.ai_ready.set()
+    
+    def _monitor_recording(self, recording_id):
+        """Monitor one recording and auto-process it when it stops."""
+        logger.debug(f"Recording monitor: watching recording {recording_id} for automatic stop")
         
-        # Check if recording stopped automatically (not manually)
-        # The daemon still thinks it's recording, but recorder has stopped
-        if self.is_recording and not self.recorder.is_recording:
+        # Block until the recorder closes its stream (silence, max duration or manual stop)
+        self.recorder.finished.wait()
+        
+        # Check if recording stopped automatically (not manually): the daemon
+        # still thinks this recording is running, but the recorder has stopped.
+        # A newer recording started after a manual stop is left alone.
+        if self.is_recording and self.recording_id == recording_id and not self.recorder.is_recording:
             logger.info("Recording stopped automatically (silence detected)")
             print("🔔 Recording stopped automatically (silence detected)")
             # Trigger the normal stop process
-            self.stop_recording()
+            self.stop_recording(recording_id)
+    
+    def _submit_segment(self, segment_futures, segment_exports, start, stop):
+        """Queue a segment cut at a pause for background encoding and transcription."""
+        logger.info(f"Segment {len(segment_futures) + 1} cut at pause "
+                    f"({(stop - start) / self.recorder.sample_rate:.2f}s), transcribing in background")
+        export = self.encode_executor.submit(self.recorder.export_segment, start, stop)
+        segment_exports.append(export)
+        segment_futures.append(self.segment_executor.submit(self._transcribe_segment, export))
     
-    def _process_audio(self, audio_file):
-        """Process audio file (transcribe and inject text)."""
-        logger.info("Starting audio transcription...")
+    def _transcribe_segment(self, export):
+        """Transcribe one segment of the current recording once it is encoded."""
+        audio_data = export.result()
+        if not audio_data:
+            return ""
+        return self.api_client.transcribe_audio(audio_data)
+    
+    def _transcribe(self, audio_data, segment_futures=None):
+        """Transcribe the final audio and stitch it after any background segments."""
+        if not segment_futures:
+            return self.api_client.transcribe_audio(audio_data)
+        
+        final_text = self.api_client.transcribe_audio(audio_data) if audio_data else ""
+        texts = [future.result() for future in segment_futures] + [final_text]
+        if any(text is None for text in texts):
+            logger.warning(f"{sum(text is None for text in texts)} of {len(texts)} segment(s) failed to transcribe")
+        text = " ".join(text for text in texts if text)
+        logger.debug(f"Stitched {len(texts)} segment(s)")
+        return text or None
+    
+    def _transcribe_stage(self, seq, item):
+        """Pipeline stage: transcribe a recording (and stitch its segments)."""
+        audio_data, segment_futures = item
+        logger.info(f"Starting audio transcription (recording {seq})...")
         print("🔄 Transcribing audio...")
-        text = self.api_client.transcribe_audio(audio_file)
+        if STREAM_TEXT_INJECTION and not segment_futures:
+            text = self._transcribe_streaming(seq, audio_data)
+        else:
+            text = self._transcribe(audio_data, segment_futures)
+        if self.api_client.cache is not None:
+            logger.debug(f"Transcription cache: {self.api_client.cache.stats()}")
+        return text
+    
+    def _find_ai_trigger(self, text):
+        """Return True if any POST_AI_TRIGGERS pattern matches the text."""
+        if not (ENABLE_AI_PROCESSING and AI_API_KEY):
+            return False
+        return self.ai_matcher.match(text) is not None
+    
+    def _transcribe_streaming(self, seq, audio_data):
+        """
+        Transcribe with a streaming response, typing segments while later ones are decoded.
+        
+        The latest segment is always held back, since it may end with a
+        post-transcription action. Once an AI trigger is heard, nothing more
+        is typed early so the rest of the text can go to the AI. Typing waits
+        until every earlier recording has been injected.
         
-        if text:
+        Returns:
+            str: The text that has not been injected yet (handled as a normal
+                transcription), "" if everything was injected, or None on failure
+        """
+        held = []
+        injected = 0
+        streaming = True
+        for segment_text in self.api_client.transcribe_audio_stream(audio_data):
+            held.append(segment_text)
+            if not streaming:
+                continue
+            if self._find_ai_trigger(" ".join(held)):
+                logger.info("AI trigger heard, buffering the rest of the transcription")
+                streaming = False
+                continue
+            while len(held) > 1:
+                self.pipeline.wait_turn(seq)
+                segment_text = held.pop(0)
+                logger.info(f"Injecting segment {injected + 1}: '{segment_text}'")
+                print(f"⌨️  Injecting segment: {segment_text}")
+                self.text_injector.inject_text(segment_text + " ")
+                injected += 1
+        
+        if not held and not injected:
+            return None
+        return " ".join(held)
+    
+    def _process_stage(self, seq, text):
+        """
+        Pipeline stage: apply post-transcription actions and AI processing.
+        
+        Returns:
+            tuple: (final_text, post_action) to inject, or None if there is nothing to do;
+                with STREAM_AI_OUTPUT, final_text may be an iterator of AI output fragments
+        """
+        if text is None:
+            logger.error("Transcription failed - no text returned from API")
+            print("❌ Transcription failed")
+            self.notify("AnyWhisper", "❌ Transcription failed")
+        elif text:
             logger.info(f"Raw transcription: '{text}'")
             print(f"✅ Transcription: {text}")
             # self.notify("AnyWhisper", f"📝 {text[:50]}{'...' if len(text) > 50 else ''}")
@@ -243,30 +535,16 @@ class VoiceDaemon:
             # Check for post-transcription actions (if enabled)
             post_action = None
             cleaned_text = text
-            matched_pattern = None
             
             if ENABLE_TRANSCRIPTION_ACTIONS:
-                logger.debug("Checking POST_TRANSCRIPTION_ACTIONS...")
-                for pattern, action in POST_TRANSCRIPTION_ACTIONS.items():
-                    # Optionally add \.? before $ to handle periods Whisper may add
-                    modified_pattern = pattern
-                    if POST_TRANSCRIPTION_OPT_DOT and pattern.endswith('$'):
-                        # Insert \.? before the $
-                        modified_pattern = pattern[:-1] + r'\.?$'
-                    
-                    # Check if pattern matches (case-insensitive)
-                    match = re.search(modified_pattern, text, re.IGNORECASE)
-                    if match:
-                        logger.info(f"POST_TRANSCRIPTION_ACTIONS triggered: pattern='{pattern}' → action={action}")
-                        print(f"🎯 Pattern matched: '{pattern}' → Action: {action}")
-                        post_action = action
-                        matched_pattern = modified_pattern
-                        # Remove the matched pattern from text
-                        cleaned_text = re.sub(modified_pattern, '', text, flags=re.IGNORECASE).strip()
-                        logger.debug(f"Text after removing pattern: '{cleaned_text}'")
-                        break
-                
-                if not post_action:
+                logger.debug(f"Checking {len(self.action_matcher)} POST_TRANSCRIPTION_ACTIONS...")
+                match = self.action_matcher.match(text)
+                if match:
+                    post_action, pattern, cleaned_text = match
+                    logger.info(f"POST_TRANSCRIPTION_ACTIONS triggered: pattern='{pattern}' → action={post_action}")
+                    print(f"🎯 Pattern matched: '{pattern}' → Action: {post_action}")
+                    logger.debug(f"Text after removing pattern: '{cleaned_text}'")
+                else:
                     logger.debug("No POST_TRANSCRIPTION_ACTIONS pattern matched")
             else:
                 logger.debug("POST_TRANSCRIPTION_ACTIONS is disabled")
@@ -276,25 +554,14 @@ class VoiceDaemon:
             final_text = cleaned_text if post_action else text
             
             if ENABLE_AI_PROCESSING and AI_API_KEY:
-                logger.debug("Checking POST_AI_TRIGGERS...")
-                for pattern, template in POST_AI_TRIGGERS.items():
-                    # Optionally add \.? before $ to handle periods
-                    modified_pattern = pattern
-                    if POST_TRANSCRIPTION_OPT_DOT and pattern.endswith('$'):
-                        modified_pattern = pattern[:-1] + r'\.?$'
-                    
-                    # Check if AI trigger pattern matches
-                    match = re.search(modified_pattern, final_text, re.IGNORECASE)
-                    if match:
-                        logger.info(f"POST_AI_TRIGGERS matched: pattern='{pattern}' → template={template}")
-                        print(f"🎯 AI trigger matched: '{pattern}' → Template: {template}")
-                        ai_template = template
-                        # Remove the AI trigger phrase from text
-                        final_text = re.sub(modified_pattern, '', final_text, flags=re.IGNORECASE).strip()
-                        logger.debug(f"Text after removing AI trigger: '{final_text}'")
-                        break
-                
-                if not ai_template:
+                logger.debug(f"Checking {len(self.ai_matcher)} POST_AI_TRIGGERS...")
+                match = self.ai_matcher.match(final_text)
+                if match:
+                    ai_template, pattern, final_text = match
+                    logger.info(f"POST_AI_TRIGGERS matched: pattern='{pattern}' → template={ai_template}")
+                    print(f"🎯 AI trigger matched: '{pattern}' → Template: {ai_template}")
+                    logger.debug(f"Text after removing AI trigger: '{final_text}'")
+                else:
                     logger.debug("No POST_AI_TRIGGERS pattern matched")
             else:
                 if not ENABLE_AI_PROCESSING:
@@ -303,13 +570,41 @@ class VoiceDaemon:
                     logger.debug("AI Processing enabled but no API key configured")
             
             # Process with AI if triggered
-            if ai_template:
+            if ai_template and STREAM_AI_OUTPUT:
+                # The inject stage consumes the stream, so it is typed in recording order
+                logger.info(f"Streaming AI output using template: {ai_template}")
+                final_text = self._stream_with_ai(final_text, ai_template)
+            elif ai_template:
                 logger.info(f"Processing with AI using template: {ai_template}")
                 final_text = self._process_with_ai(final_text, ai_template)
                 logger.info(f"AI output: '{final_text}'")
             else:
                 logger.debug("No AI processing triggered")
             
+            return final_text, post_action
+        return None
+    
+    def _inject_ai_stream(self, chunks, post_action):
+        """Type streamed AI output a sentence or line at a time, as it is generated."""
+        success, final_text = self.text_injector.inject_stream(chunks, post_action=post_action)
+        logger.info(f"AI output: '{final_text}'")
+        print(f"✅ AI processed: {final_text[:100]}{'...' if len(final_text) > 100 else ''}")
+        if not success:
+            logger.warning("Streamed text injection failed, copying AI output to clipboard")
+            print("⚠️  Falling back to clipboard...")
+            self.text_injector.copy_to_clipboard(final_text)
+            self.notify("AnyWhisper", "📋 Copied to clipboard (Ctrl+V to paste)")
+    
+    def _inject_stage(self, seq, result):
+        """Pipeline stage: inject a processed transcription (runs in recording order)."""
+        if result is not None:
+            final_text, post_action = result
+            
+            if not isinstance(final_text, str):
+                # Streamed AI output (an iterator of text fragments)
+                self._inject_ai_stream(final_text, post_action)
+                return
+            
             # Inject the text (after all processing)
             if final_text:  # Only inject if there's text left after all processing
                 logger.info(f"Injecting text: '{final_text}' (length={len(final_text)})")
@@ -336,45 +631,98 @@ class VoiceDaemon:
                 self.text_injector._execute_key_action(post_action)
             else:
                 logger.warning("No final text to inject and no post-action to execute")
-        else:
-            logger.error("Transcription failed - no text returned from API")
-            print("❌ Transcription failed")
-            self.notify("AnyWhisper", "❌ Transcription failed")
+    
+    async def handle_connection(self, reader, writer):
+        """
+        Serve one control connection.
         
-        # Clean up temp file
+        A connection may stay open and send any number of newline-terminated
+        commands; each gets a newline-terminated response, in order. A bare
+        command without a newline (older trigger scripts) is answered
+        without one.
+        """
+        logger.debug("Client connected")
+        self.connections[writer] = asyncio.current_task()
+        buffer = b''
         try:
-            if os.path.exists(audio_file):
-                os.remove(audio_file)
-        except:
-            pass
+            while True:
+                chunk = await reader.read(1024)
+                if not chunk:
+                    break
+                buffer += chunk
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    command = line.decode('utf-8', errors='replace').strip()
+                    if command:
+                        response = await self.dispatch_command(command)
+                        writer.write(response.encode('utf-8') + b'\n')
+                
+                bare_command = buffer.decode('utf-8', errors='replace').strip()
+                if bare_command in CONTROL_COMMANDS:
+                    buffer = b''
+                    response = await self.dispatch_command(bare_command)
+                    writer.write(response.encode('utf-8'))
+                elif len(buffer) > MAX_COMMAND_LENGTH:
+                    logger.warning("Control command too long, dropping connection")
+                    break
+                await writer.drain()
+        except ConnectionError as e:
+            logger.debug(f"Client connection lost: {e}")
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
     
-    def handle_client(self, client_socket):
-        """Handle client connection."""
+    async def dispatch_command(self, command):
+        """Run a control command and return its response."""
+        logger.debug(f"Received command: '{command}'")
+        if command == "STATUS":
+            return "RECORDING" if self.is_recording else "IDLE"
+        if command == "PING":
+            return "PONG"
+        if command == "QUEUES":
+            return " ".join(f"{stage}={depth}" for stage, depth in self.pipeline.depths().items())
+        
+        handlers = {
+            "START": self.start_recording,
+            "STOP": self.stop_recording,
+            "TOGGLE": self.toggle_recording,
+        }
+        if command not in handlers:
+            logger.warning(f"Unknown command received: '{command}'")
+            return "UNKNOWN_COMMAND"
+        
+        if self.pending_commands >= MAX_PENDING_COMMANDS:
+            logger.warning(f"Too many pending commands, rejecting '{command}'")
+            return "BUSY"
+        self.pending_commands += 1
         try:
-            data = client_socket.recv(1024).decode('utf-8').strip()
-            logger.debug(f"Received command: '{data}'")
-            
-            if data == "START":
-                response = self.start_recording()
-            elif data == "STOP":
-                response = self.stop_recording()
-            elif data == "TOGGLE":
-                response = self.toggle_recording()
-            elif data == "STATUS":
-                response = "RECORDING" if self.is_recording else "IDLE"
-            elif data == "PING":
-                response = "PONG"
-            else:
-                logger.warning(f"Unknown command received: '{data}'")
-                response = "UNKNOWN_COMMAND"
-            
-            client_socket.send(response.encode('utf-8'))
+            response = await asyncio.get_running_loop().run_in_executor(self.command_executor, handlers[command])
             logger.debug(f"Sent response: '{response}'")
+            return response
         except Exception as e:
-            logger.error(f"Error handling client: {e}", exc_info=True)
+            logger.error(f"Error handling command '{command}': {e}", exc_info=True)
             print(f"Error handling client: {e}")
+            return "ERROR"
         finally:
-            client_socket.close()
+            self.pending_commands -= 1
+    
+    async def serve(self):
+        """Serve control connections on one event loop until a shutdown signal arrives."""
+        loop = asyncio.get_running_loop()
+        self.stop_serving = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop_serving.set)
+        
+        server = await asyncio.start_unix_server(self.handle_connection, sock=self.socket)
+        async with server:
+            await self.stop_serving.wait()
+            # Close idle persistent connections too: since Python 3.12, leaving
+            # the server context waits until every client connection is closed
+            server.close()
+            handlers = list(self.connections.values())
+            for writer in list(self.connections):
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
     
     def start_ydotoold_if_needed(self):
         """Start ydotoold if on Wayland and not already running."""
@@ -402,7 +750,6 @@ class VoiceDaemon:
                 import subprocess
                 logger.info(f"Starting local ydotoold from: {ydotoold_path}")
                 self.ydotoold_process = subprocess.Popen([ydotoold_path])
-                import time
                 time.sleep(1)
                 logger.info("Local ydotoold daemon started successfully")
                 print("✓ Started local ydotoold daemon")
@@ -416,6 +763,19 @@ class VoiceDaemon:
         # Start ydotoold if needed (Wayland only)
         self.start_ydotoold_if_needed()
         
+        # Import and connect the AI client while the rest of startup runs
+        if ENABLE_AI_PROCESSING and AI_API_KEY:
+            threading.Thread(target=self._warm_up_ai, daemon=True, name='ai-warm-up').start()
+        else:
+            self.ai_ready.set()
+        
+        # Keep the microphone stream open so recordings start instantly
+        if KEEP_STREAM_WARM:
+            if self.recorder.open_stream():
+                logger.info("Warm input stream opened (pre-roll enabled)")
+            else:
+                logger.warning("Could not open warm input stream, recordings will open their own")
+        
         # Remove old socket if it exists
         try:
             os.unlink(SOCKET_PATH)
@@ -452,6 +812,10 @@ class VoiceDaemon:
             print("   Make sure Docker container is running:")
             print("   docker run -d -p 127.0.0.1:4444:4444 --name whisper-assistant whisper-assistant")
         
+        # Keep watching the API so dictations fail fast if it goes down
+        self.api_client.start_health_monitor()
+        logger.info("Whisper API health monitor started")
+        
         print("\n📝 To bind global shortcut:")
         print("   GNOME: Settings → Keyboard → Custom Shortcuts")
         print(f"   Command: {os.path.abspath('voice_trigger.py')}")
@@ -462,22 +826,7 @@ class VoiceDaemon:
         
         # Accept connections
         logger.info("Daemon ready, accepting connections...")
-        while self.running:
-            try:
-                self.socket.settimeout(1.0)
-                try:
-                    client, _ = self.socket.accept()
-                    logger.debug("Client connected")
-                    threading.Thread(target=self.handle_client, args=(client,), daemon=True).start()
-                except socket.timeout:
-                    continue
-            except KeyboardInterrupt:
-                logger.info("Keyboard interrupt received")
-                break
-            except Exception as e:
-                if self.running:
-                    logger.error(f"Error in main loop: {e}", exc_info=True)
-                    print(f"Error: {e}")
+        asyncio.run(self.serve())
         
         self.shutdown(None, None)
     
@@ -494,6 +843,12 @@ class VoiceDaemon:
             logger.info("Stopping active recording...")
             self.recorder.stop_recording()
         
+        self.recorder.close_stream()
+        self.api_client.stop_health_monitor()
+        self.segment_executor.shutdown(wait=False)
+        self.command_executor.shutdown(wait=False)
+        self.encode_executor.shutdown(wait=False)
+        
         if self.socket:
             self.socket.close()
             logger.debug("Socket closed")
@@ -19,10 +19,15 @@ def send_command(command):
     try:
         client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         client.connect(SOCKET_PATH)
-        client.send(command.encode('utf-8'))
-        response = client.recv(1024).decode('utf-8')
+        client.sendall(command.encode('utf-8') + b'\n')
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = client.recv(1024)
+            if not chunk:
+                break
+            response += chunk
         client.close()
-        return response
+        return response.decode('utf-8').strip()
     except FileNotFoundError:
         print("Error: Daemon not running. Start it with: python voice_daemon.py", file=sys.stderr)
         os.system('notify-send "AnyWhisper" "❌ Daemon not running! Start voice_daemon.py" 2>/dev/null &')
@@ -37,9 +42,9 @@ def main():
     # Default to TOGGLE if no argument provided
     command = sys.argv[1].upper() if len(sys.argv) > 1 else "TOGGLE"
     
-    if command not in ["START", "STOP", "TOGGLE", "STATUS", "PING"]:
+    if command not in ["START", "STOP", "TOGGLE", "STATUS", "PING", "QUEUES"]:
         print(f"Unknown command: {command}")
-        print("Usage: voice_trigger.py [START|STOP|TOGGLE|STATUS|PING]")
+        print("Usage: voice_trigger.py [START|STOP|TOGGLE|STATUS|PING|QUEUES]")
         sys.exit(1)
     
     response = send_command(command)
@@ -0,0 +1,397 @@
+"""Whisper transcription server (runs inside the Docker container as main.py)."""
+
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from faster_whisper import WhisperModel, decode_audio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import functools
+import asyncio
+import tempfile
+import threading
+import json
+import math
+import time
+import os
+
+app = FastAPI(title="Whisper Assistant API")
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Allows all origins
+    allow_credentials=True,
+    allow_methods=["*"],  # Allows all methods
+    allow_headers=["*"],  # Allows all headers
+)
+
+# Loaded at startup (already downloaded during build) so helpers can be imported without it
+whisper_model = None
+
+# Concurrency, set with docker run -e ...
+NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))  # Transcriptions decoded in parallel
+CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # Threads per transcription (0 = CTranslate2 default)
+QUEUE_SIZE = int(os.getenv("WHISPER_QUEUE_SIZE", "8"))  # Requests that may wait for a worker before 429
+
+# Decoding, set with docker run -e ... (python benchmark.py tune helps pick these)
+COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "5"))  # Default when a request does not ask for one
+VAD_FILTER = os.getenv("WHISPER_VAD_FILTER", "true").lower() == "true"
+
+
+class WorkerPool:
+    """Runs blocking model calls on worker threads, admitting a bounded number of requests.
+    
+    Admission bookkeeping only happens on the event loop, so it needs no lock;
+    the busy/waiting counters are also updated from worker threads.
+    """
+    
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper")
+        self.pending = 0  # Admitted requests, running or waiting for a worker
+        self.hold_time = None  # Moving average of how long a request keeps its slot
+        self.lock = threading.Lock()
+        self.waiting = 0  # Calls submitted but not yet picked up by a worker
+        self.busy = 0  # Workers currently running a call
+        self.busy_seconds = 0.0  # Total time workers have spent running calls
+    
+    def try_acquire(self):
+        """Admit a request if there is room in the queue"""
+        if self.pending >= self.capacity:
+            return False
+        self.pending += 1
+        return True
+    
+    def release(self, started):
+        """Give back a request's slot and record how long it was held"""
+        self.pending -= 1
+        held = time.monotonic() - started
+        self.hold_time = held if self.hold_time is None else 0.8 * self.hold_time + 0.2 * held
+    
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, for the Retry-After header"""
+        if self.hold_time is None:
+            return 1
+        return max(1, math.ceil(self.hold_time / self.capacity))
+    
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking call on a worker thread without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            self.waiting += 1
+        return await loop.run_in_executor(self.executor, self._work, functools.partial(func, *args, **kwargs))
+    
+    def _work(self, call):
+        """Run one call on a worker thread, keeping the utilization counters"""
+        with self.lock:
+            self.waiting -= 1
+            self.busy += 1
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            with self.lock:
+                self.busy -= 1
+                self.busy_seconds += time.perf_counter() - start
+
+
+class Histogram:
+    """Prometheus-style histogram with cumulative buckets"""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        """Record one value"""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+    
+    def render(self, name, labels=""):
+        """Return the sample lines for this histogram; labels is e.g. 'stage="decode"'"""
+        prefix = labels + "," if labels else ""
+        lines = [f'{name}_bucket{{{prefix}le="{bound}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class Metrics:
+    """Request, audio and per-stage timing metrics, served in the Prometheus text format at /metrics"""
+    
+    # upload_read: reading the upload; decode: PCM conversion or ffmpeg; vad: transcribe()'s
+    # eager work (VAD and feature extraction); inference: decoding the segments
+    STAGES = ("upload_read", "decode", "vad", "inference")
+    STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}  # Transcription responses by HTTP status code
+        self.audio_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.processing_seconds = 0.0
+        self.stage_seconds = {stage: Histogram(self.STAGE_BUCKETS) for stage in self.STAGES}
+        self.rtf = Histogram(self.RTF_BUCKETS)
+    
+    def count_request(self, status_code):
+        """Count a transcription request by its response status"""
+        with self.lock:
+            self.requests[status_code] = self.requests.get(status_code, 0) + 1
+    
+    def record_transcription(self, stages, info):
+        """Record a finished transcription's stage timings and audio duration"""
+        processing = sum(stages.get(stage, 0.0) for stage in ("decode", "vad", "inference"))
+        with self.lock:
+            for stage, seconds in stages.items():
+                self.stage_seconds[stage].observe(seconds)
+            self.audio_seconds += info.duration
+            self.speech_seconds += info.duration_after_vad
+            self.processing_seconds += processing
+            if info.duration > 0:
+                self.rtf.observe(processing / info.duration)
+    
+    def render(self, pool):
+        """Return all metrics in the Prometheus text exposition format"""
+        def metric(name, kind, help_text, samples):
+            return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"] + samples
+        
+        with self.lock, pool.lock:
+            lines = metric("whisper_requests_total", "counter", "Transcription requests by HTTP status code",
+                           [f'whisper_requests_total{{code="{code}"}} {count}' for code, count in sorted(self.requests.items())])
+            lines += metric("whisper_audio_seconds_total", "counter", "Seconds of audio transcribed",
+                            [f"whisper_audio_seconds_total {self.audio_seconds}"])
+            lines += metric("whisper_speech_seconds_total", "counter", "Seconds of audio left after VAD",
+                            [f"whisper_speech_seconds_total {self.speech_seconds}"])
+            lines += metric("whisper_processing_seconds_total", "counter", "Seconds spent decoding, in VAD and in inference",
+                            [f"whisper_processing_seconds_total {self.processing_seconds}"])
+            lines += metric("whisper_real_time_factor", "histogram", "Processing time divided by audio duration per request",
+                            self.rtf.render("whisper_real_time_factor"))
+            stage_samples = []
+            for stage, histogram in self.stage_seconds.items():
+                stage_samples += histogram.render("whisper_stage_seconds", f'stage="{stage}"')
+            lines += metric("whisper_stage_seconds", "histogram", "Time per request spent in each processing stage",
+                            stage_samples)
+            lines += metric("whisper_requests_pending", "gauge", "Admitted requests, running or queued",
+                            [f"whisper_requests_pending {pool.pending}"])
+            lines += metric("whisper_queue_capacity", "gauge", "Requests admitted before answering 429",
+                            [f"whisper_queue_capacity {pool.capacity}"])
+            lines += metric("whisper_queue_depth", "gauge", "Model calls waiting for a free worker",
+                            [f"whisper_queue_depth {pool.waiting}"])
+            lines += metric("whisper_workers", "gauge", "Model workers",
+                            [f"whisper_workers {pool.workers}"])
+            lines += metric("whisper_workers_busy", "gauge", "Model workers currently running a call",
+                            [f"whisper_workers_busy {pool.busy}"])
+            lines += metric("whisper_worker_busy_seconds_total", "counter",
+                            "Seconds workers have spent busy; rate() / whisper_workers is utilization",
+                            [f"whisper_worker_busy_seconds_total {pool.busy_seconds}"])
+        return "\n".join(lines) + "\n"
+
+
+pool = WorkerPool(NUM_WORKERS, QUEUE_SIZE)
+metrics = Metrics()
+
+# Raw 16 kHz mono sample formats, by upload content type and pcm_format name
+PCM_CONTENT_TYPES = {
+    "audio/x-pcm-s16le": "int16",
+    "audio/x-pcm-f32le": "float32",
+}
+PCM_DTYPES = {
+    "int16": np.dtype("<i2"),
+    "float32": np.dtype("<f4"),
+}
+
+
+@app.on_event("startup")
+def load_model():
+    """Initialize the model"""
+    global whisper_model
+    whisper_model = WhisperModel(
+        os.getenv("WHISPER_MODEL_SIZE", "small"),
+        device="cpu",
+        compute_type=COMPUTE_TYPE,
+        cpu_threads=CPU_THREADS,
+        num_workers=NUM_WORKERS
+    )
+
+
+def decode_pcm(content, pcm_format):
+    """Turn raw 16 kHz mono PCM bytes into the float32 array faster-whisper takes directly"""
+    dtype = PCM_DTYPES[pcm_format]
+    samples = np.frombuffer(content, dtype=dtype, count=len(content) // dtype.itemsize)
+    if pcm_format == "int16":
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32)
+
+
+def decode_file(content):
+    """Decode an uploaded audio file with ffmpeg through a temp file"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
+        temp_file.write(content)
+    try:
+        return decode_audio(temp_file.name, sampling_rate=16000)
+    finally:
+        os.unlink(temp_file.name)
+
+
+def timed(stages, stage, func, *args, **kwargs):
+    """Call func and add its run time to stages[stage]"""
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+
+
+def format_segment(i, segment):
+    """Format a faster-whisper segment like the OpenAI API does"""
+    return {
+        "id": i,
+        "seek": 0,
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text,
+        "tokens": [],
+        "temperature": 0.0,
+    }
+
+
+async def stream_segments(segments, info, stages, started):
+    """Yield one JSON line per segment as a worker decodes it, then a final summary line"""
+    try:
+        texts = []
+        while True:
+            segment = await pool.run(timed, stages, "inference", next, segments, None)
+            if segment is None:
+                break
+            yield json.dumps({"type": "segment", **format_segment(len(texts), segment)}) + "\n"
+            texts.append(segment.text)
+        metrics.record_transcription(stages, info)
+        yield json.dumps({"type": "done", "text": " ".join(texts), "language": info.language}) + "\n"
+    finally:
+        pool.release(started)
+
+
+@app.post("/v1/audio/transcriptions")
+async def transcribe_audio(
+    file: UploadFile = File(...),
+    model_name: str = "whisper-1",  # Renamed parameter to avoid conflict
+    language: str = "en",
+    stream: bool = False,
+    pcm_format: str = None,
+    beam_size: int = None
+):
+    """Transcribe audio file to text
+    
+    Raw 16 kHz mono PCM (pcm_format=int16 or float32, or an audio/x-pcm-s16le
+    or audio/x-pcm-f32le upload) is decoded in memory; anything else goes
+    through a temp file and ffmpeg.
+    
+    Decoding runs on the worker pool. When NUM_WORKERS requests are running
+    and QUEUE_SIZE more are waiting, new requests get 429 with Retry-After.
+    
+    beam_size overrides WHISPER_BEAM_SIZE for this request, e.g. 1 (greedy)
+    for short commands where latency matters most.
+    
+    With stream=true the response is newline-delimited JSON: one
+    {"type": "segment", ...} line per segment as soon as it is decoded,
+    followed by {"type": "done", "text": ..., "language": ...}.
+    """
+    if not pool.try_acquire():
+        metrics.count_request(429)
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy, transcription queue is full",
+            headers={"Retry-After": str(pool.retry_after())}
+        )
+    started = time.monotonic()
+    stages = {}
+    status_code = 500
+    streaming = False
+    try:
+        read_start = time.perf_counter()
+        content = await file.read()
+        stages["upload_read"] = time.perf_counter() - read_start
+        content_type = (file.content_type or "").split(";")[0].strip().lower()
+        pcm_format = pcm_format or PCM_CONTENT_TYPES.get(content_type)
+        
+        if pcm_format:
+            if pcm_format not in PCM_DTYPES:
+                raise HTTPException(status_code=400, detail=f"Unsupported pcm_format '{pcm_format}', use int16 or float32")
+            audio = timed(stages, "decode", decode_pcm, content, pcm_format)
+        else:
+            audio = await pool.run(timed, stages, "decode", decode_file, content)
+        
+        # Transcribe the audio on a worker (segments are decoded lazily while iterating)
+        segments, info = await pool.run(
+            timed, stages, "vad",
+            whisper_model.transcribe,
+            audio,
+            language=language,
+            beam_size=beam_size or BEAM_SIZE,
+            vad_filter=VAD_FILTER
+        )
+        
+        if stream:
+            # The stream releases the worker slot when done
+            streaming = True
+            status_code = 200
+            return StreamingResponse(
+                stream_segments(segments, info, stages, started),
+                media_type="application/x-ndjson"
+            )
+        
+        # Format response to match OpenAI API
+        formatted_segments = await pool.run(
+            timed, stages, "inference",
+            lambda: [format_segment(i, segment) for i, segment in enumerate(segments)]
+        )
+        metrics.record_transcription(stages, info)
+        status_code = 200
+        
+        return {
+            "text": " ".join(seg["text"] for seg in formatted_segments),
+            "segments": formatted_segments,
+            "language": info.language
+        }
+    except HTTPException as e:
+        status_code = e.status_code
+        raise
+    finally:
+        metrics.count_request(status_code)
+        if not streaming:
+            pool.release(started)
+
+
+@app.get("/v1/health")
+async def health_check():
+    """Check if the API is running"""
+    return {"status": "ok", "workers": pool.workers, "pending": pool.pending, "capacity": pool.capacity}
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Expose server metrics for Prometheus"""
+    return PlainTextResponse(metrics.render(pool), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/")
+async def root():
+    """Get API information and available endpoints"""
+    return {
+        "message": "Whisper Assistant API",
+        "docs": "/docs",
+        "health_check": "/v1/health",
+        "metrics": "/metrics",
+        "transcribe": "/v1/audio/transcriptions"
+    }